@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# Benchmarks de los caminos calientes de datos (parseo, merge, recortes, top N, mindicador),
+# con payloads sintéticos de tamaño parametrizable y salida JSON comparable entre commits.
+#
+#   python benchmarks/bench_hotpaths.py --out bench.json
+#   python benchmarks/bench_hotpaths.py --quick --filter uv_json
+#   python benchmarks/bench_hotpaths.py --out new.json --compare bench.json --threshold 1.25
+#
+# Con --compare, sale con código 1 si algún caso es más lento que la base por sobre el umbral.
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+
+from uvnorte.frames import (_hourly_json_to_df, _mindicador_serie_to_df, _uv_json_to_df, clip_by_date,
+                            compute_top_days, slice_sorted)
+from uvnorte.http import _loads
+from uvnorte.mockserver import daily_payload, hourly_payload, mindicador_payload
+from uvnorte.uv import _merge_archive_forecast, _split_locations
+
+# Tamaños: días de histórico y número de ubicaciones
+DAYS = {"180d": 180, "5y": 5 * 365, "25y": 25 * 365}
+LOCATIONS = (1, 10, 100)
+HOURLY_DAYS = (7, 16)
+QUICK_DAYS = {"180d": 180, "5y": 5 * 365}
+QUICK_LOCATIONS = (1, 10)
+
+MIN_ROUND_SECONDS = 0.05   # cada repetición corre la función las veces necesarias para durar esto
+REPEAT = 5
+END = date(2026, 1, 1)     # fecha fija: payloads idénticos en cada corrida
+
+# -----------------------------
+# Generadores de entradas
+# -----------------------------
+def _coords(n: int) -> list[tuple[float, float]]:
+    return [(-18.0 - 0.05 * i, -70.0 + 0.03 * i) for i in range(n)]
+
+def multi_daily(days: int, n: int, timeformat: str = "iso8601"):
+    start = END - timedelta(days=days - 1)
+    items = [daily_payload(lat, lon, start, END, timeformat) for lat, lon in _coords(n)]
+    return items if n > 1 else items[0]
+
+def multi_hourly(days: int, n: int, timeformat: str = "iso8601"):
+    items = [hourly_payload(lat, lon, END, days, timeformat) for lat, lon in _coords(n)]
+    return items if n > 1 else items[0]
+
+def daily_df(days: int, lag: int = 0) -> pd.DataFrame:
+    return _uv_json_to_df(daily_payload(-22.0, -68.0, END - timedelta(days=days - 1), END - timedelta(days=lag)))
+
+# -----------------------------
+# Casos: nombre -> (params, preparación) ; la preparación devuelve la función a medir
+# -----------------------------
+def cases(quick: bool):
+    days_grid = QUICK_DAYS if quick else DAYS
+    locs_grid = QUICK_LOCATIONS if quick else LOCATIONS
+
+    for label, days in days_grid.items():
+        for n in locs_grid:
+            def prep(days=days, n=n):
+                payload = multi_daily(days, n)
+                return lambda: [_uv_json_to_df(d) for d in _split_locations(payload, n)]
+            yield "uv_json_to_df", {"days": label, "locations": n}, prep
+
+            def prep(days=days, n=n):
+                payload = multi_daily(days, n, "unixtime")
+                return lambda: [_uv_json_to_df(d) for d in _split_locations(payload, n)]
+            yield "uv_json_to_df_unixtime", {"days": label, "locations": n}, prep
+
+            def prep(days=days, n=n):
+                raw = json.dumps(multi_daily(days, n)).encode("utf-8")
+                return lambda: _loads(raw)
+            yield "json_decode", {"days": label, "locations": n}, prep
+
+            def prep(days=days, n=n):
+                # json de la biblioteca estándar, como referencia para json_decode
+                raw = json.dumps(multi_daily(days, n)).encode("utf-8")
+                return lambda: json.loads(raw)
+            yield "json_decode_stdlib_reference", {"days": label, "locations": n}, prep
+
+    for days in HOURLY_DAYS:
+        for n in locs_grid:
+            def prep(days=days, n=n):
+                payload = multi_hourly(days, n)
+                return lambda: [_hourly_json_to_df(d) for d in _split_locations(payload, n)]
+            yield "hourly_json_to_df", {"days": days, "locations": n}, prep
+
+            def prep(days=days, n=n):
+                payload = multi_hourly(days, n, "unixtime")
+                return lambda: [_hourly_json_to_df(d) for d in _split_locations(payload, n)]
+            yield "hourly_json_to_df_unixtime", {"days": days, "locations": n}, prep
+
+    for label, days in days_grid.items():
+        def prep(days=days):
+            # archive hasta hace 5 días + forecast(past_days) para completar el tramo faltante
+            df_arch = daily_df(days, lag=5)
+            df_fc = _uv_json_to_df(daily_payload(-22.0, -68.0, END - timedelta(days=30), END))
+            start = END - timedelta(days=days - 1)
+            return lambda: _merge_archive_forecast(df_arch, df_fc, None, start, END, 30)
+        yield "merge_archive_forecast", {"days": label}, prep
+
+        def prep(days=days):
+            df = daily_df(days)
+            a, b = END - timedelta(days=days // 2), END - timedelta(days=days // 4)
+            return lambda: slice_sorted(df, a, b)
+        yield "slice_sorted", {"days": label}, prep
+
+        def prep(days=days):
+            df = daily_df(days)
+            # la máscara booleana que reemplazó slice_sorted, como referencia
+            a, b = pd.Timestamp(END - timedelta(days=days // 2)), pd.Timestamp(END - timedelta(days=days // 4))
+            return lambda: df[(df["date"] >= a) & (df["date"] <= b)]
+        yield "mask_filter_reference", {"days": label}, prep
+
+        def prep(days=days):
+            df = daily_df(days).rename(columns={"uv_index_max": "value"})
+            a = END - timedelta(days=90)
+            return lambda: clip_by_date(df, a, END)
+        yield "clip_by_date", {"days": label}, prep
+
+        def prep(days=days):
+            df = daily_df(days)
+            return lambda: compute_top_days(df, 5)
+        yield "compute_top_days", {"days": label}, prep
+
+        def prep(days=days):
+            serie = mindicador_payload("dolar", END - timedelta(days=days - 1), END)["serie"]
+            return lambda: _mindicador_serie_to_df(serie)
+        yield "mindicador_serie_to_df", {"days": label}, prep
+
+# -----------------------------
+# Medición
+# -----------------------------
+def _autorange(fn) -> int:
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - t0 >= MIN_ROUND_SECONDS:
+            return number
+        number *= 2
+
+def measure(fn, repeat: int = REPEAT) -> dict:
+    fn()  # calentamiento
+    number = _autorange(fn)
+    per_call = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - t0) / number * 1000.0)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min_ms": min(per_call),
+        "median_ms": statistics.median(per_call),
+        "mean_ms": statistics.fmean(per_call),
+    }
+
+def _case_id(name: str, params: dict) -> str:
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run(quick: bool = False, name_filter: str | None = None, repeat: int = REPEAT) -> dict:
+    results = []
+    for name, params, prep in cases(quick):
+        case = _case_id(name, params)
+        if name_filter and name_filter not in case:
+            continue
+        stats = measure(prep(), repeat)
+        results.append({"id": case, "name": name, "params": params, **stats})
+        print(f"{case:<55} {stats['median_ms']:>10.3f} ms  (min {stats['min_ms']:.3f}, n={stats['number']})", flush=True)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Casos más lentos que la base por sobre 'threshold' (razón de mínimos: lo menos ruidoso)."""
+    base = {r["id"]: r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'caso':<55} {'base':>10} {'actual':>10} {'razón':>7}")
+    for r in current["results"]:
+        b = base.get(r["id"])
+        if b is None:
+            continue
+        ratio = r["min_ms"] / b["min_ms"] if b["min_ms"] else float("inf")
+        flag = "  <-- regresión" if ratio > threshold else ""
+        print(f"{r['id']:<55} {b['min_ms']:>10.3f} {r['min_ms']:>10.3f} {ratio:>7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(r["id"])
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks de los caminos calientes de datos de uvnorte.")
+    ap.add_argument("--out", type=Path, default=None, help="archivo JSON de resultados")
+    ap.add_argument("--quick", action="store_true", help="sólo tamaños chicos (para CI)")
+    ap.add_argument("--filter", default=None, help="sólo casos cuyo id contenga este texto")
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    ap.add_argument("--compare", type=Path, default=None, help="resultados base para comparar")
+    ap.add_argument("--threshold", type=float, default=1.25, help="razón actual/base que cuenta como regresión")
+    a = ap.parse_args(argv)
+
+    current = run(a.quick, a.filter, a.repeat)
+    if a.out:
+        a.out.write_text(json.dumps(current, indent=2), encoding="utf-8")
+    if a.compare:
+        regressions = compare(current, json.loads(a.compare.read_text(encoding="utf-8")), a.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones sobre {a.threshold:g}x")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# Prueba de carga de la app: N sesiones headless (streamlit.testing AppTest) concurrentes,
+# cada una en su propio proceso, recorriendo interacciones reales de la barra lateral contra
+# el servidor local (uvnorte.mockserver). Reporta latencia de render por interacción
+# (p50/p95/máx), tiempo por etapa (uvnorte.metrics), requests al upstream y tasa de
+# aciertos de caché por función.
+#
+#   python benchmarks/loadtest_app.py --sessions 20 --steps 15 --latency-ms 120 --out load.json
+#
+# Un proceso por sesión: AppTest usa el runtime de Streamlit sin parches (no admite varias
+# corridas concurrentes en un mismo proceso). Las sesiones comparten lo que comparten las
+# réplicas: la caché SQLite (UV_CACHE_BACKEND=sqlite, por defecto aquí) y los almacenes locales.
+# Todo corre contra el servidor local y un directorio de datos temporal: no toca la red
+# ni el .uv_data del repositorio.
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "proyecto-uv.py"
+sys.path.insert(0, str(ROOT))
+
+ACTIONS = ("ciudad", "fechas", "pronostico", "cobre")
+RENDER_TIMEOUT_SECONDS = 120
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class SessionRunner:
+    """Una sesión de usuario: primer render + 'steps' interacciones al azar con pausas."""
+
+    def __init__(self, sid: int, steps: int, think_ms: float, seed: int):
+        self.sid = sid
+        self.steps = steps
+        self.think_ms = think_ms
+        self.rng = random.Random(seed + sid)
+        self.samples: list[tuple[str, float]] = []   # (acción, ms)
+        self.errors: list[str] = []
+
+    def _render(self, at, action: str) -> None:
+        t0 = time.perf_counter()
+        at.run(timeout=RENDER_TIMEOUT_SECONDS)
+        self.samples.append((action, (time.perf_counter() - t0) * 1000.0))
+        if at.exception:
+            self.errors.extend(f"{action}: {e.message}" for e in at.exception)
+
+    def _act(self, at, action: str, cities: list[str]) -> None:
+        if action == "ciudad":
+            at.selectbox[0].set_value(self.rng.choice(cities))
+        elif action == "fechas":
+            # 'Hasta' entre ayer y 60 días atrás (cambia la ventana de 6 meses del histórico)
+            fin = date.today() - timedelta(days=1 + self.rng.randint(0, 60))
+            at.date_input[1].set_value(fin)
+        elif action == "pronostico":
+            at.slider[0].set_value(self.rng.randint(1, 7))
+        elif action == "cobre":
+            at.slider[1].set_value(self.rng.randint(30, 180))
+
+    def run(self, cities: list[str]) -> None:
+        from streamlit.testing.v1 import AppTest
+        try:
+            at = AppTest.from_file(str(APP), default_timeout=RENDER_TIMEOUT_SECONDS)
+            self._render(at, "inicial")
+            for _ in range(self.steps):
+                if self.think_ms:
+                    time.sleep(self.rng.uniform(0, self.think_ms) / 1000.0)
+                action = self.rng.choice(ACTIONS)
+                self._act(at, action, cities)
+                self._render(at, action)
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e!r}")
+
+def _run_session(sid: int, steps: int, think_ms: float, seed: int) -> dict:
+    """Proceso hijo: una sesión con su propio runtime de Streamlit; devuelve muestras y contadores."""
+    from uvnorte import CIUDADES, cache_counters, metrics
+
+    runner = SessionRunner(sid, steps, think_ms, seed)
+    runner.run(list(CIUDADES))
+    return {"samples": runner.samples, "errors": runner.errors,
+            "cache": cache_counters(), "stages": metrics.stage_samples()}
+
+def run_load(sessions: int, steps: int, think_ms: float, ramp_ms: float, seed: int, server) -> dict:
+    # spawn: los hijos no heredan los hilos del servidor local (fork con hilos no es seguro)
+    ctx = multiprocessing.get_context("spawn")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=sessions, mp_context=ctx) as pool:
+        futures = []
+        for sid in range(sessions):
+            futures.append(pool.submit(_run_session, sid, steps, think_ms, seed))
+            if ramp_ms:
+                time.sleep(ramp_ms / 1000.0)
+        results = []
+        for sid, fut in enumerate(futures):
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append({"samples": [], "errors": [f"sesión {sid}: {type(e).__name__}: {e!r}"],
+                                "cache": {}, "stages": {}})
+    wall = time.perf_counter() - t0
+
+    by_action: dict[str, list[float]] = defaultdict(list)
+    for r in results:
+        for action, ms in r["samples"]:
+            by_action[action].append(ms)
+    all_ms = [ms for values in by_action.values() for ms in values]
+    latency = {
+        action: {
+            "count": len(values),
+            "p50_ms": statistics.median(values),
+            "p95_ms": _percentile(values, 0.95),
+            "max_ms": max(values),
+        }
+        for action, values in sorted(by_action.items())
+    }
+    latency["todas"] = {"count": len(all_ms), "p50_ms": statistics.median(all_ms) if all_ms else float("nan"),
+                        "p95_ms": _percentile(all_ms, 0.95), "max_ms": max(all_ms, default=float("nan"))}
+
+    counters: dict[str, dict[str, int]] = defaultdict(lambda: {"hit": 0, "stale": 0, "miss": 0})
+    for r in results:
+        for ns, c in r["cache"].items():
+            for outcome, n in c.items():
+                counters[ns][outcome] = counters[ns].get(outcome, 0) + n
+    cache = {}
+    for ns, c in sorted(counters.items()):
+        total = c["hit"] + c["stale"] + c["miss"]
+        cache[ns] = {**c, "hit_ratio": (c["hit"] + c["stale"]) / total if total else None}
+
+    upstream = defaultdict(int)
+    for (path, status), n in server.api.counts.items():
+        upstream[f"{path} {status}"] += n
+
+    return {
+        "config": {"sessions": sessions, "steps": steps, "think_ms": think_ms, "ramp_ms": ramp_ms, "seed": seed},
+        "wall_s": wall,
+        "renders_per_s": len(all_ms) / wall if wall else None,
+        "latency": latency,
+        "upstream_calls": dict(sorted(upstream.items())),
+        "upstream_total": sum(upstream.values()),
+        "cache": cache,
+        "stages": _merge_stages(r["stages"] for r in results),
+        "errors": [e for r in results for e in r["errors"]],
+    }
+
+def _merge_stages(per_process) -> list[dict]:
+    """Combina Metrics.stage_samples() de cada proceso en filas como Metrics.stage_summary()."""
+    merged: dict[str, list] = defaultdict(lambda: [0, 0.0, []])
+    for stages in per_process:
+        for stage, (n, total, recent) in stages.items():
+            merged[stage][0] += n
+            merged[stage][1] += total
+            merged[stage][2].extend(recent)
+    rows = [{"stage": stage, "n": n, "total_ms": total * 1000.0,
+             "p50_ms": statistics.median(recent) * 1000.0 if recent else None,
+             "p95_ms": _percentile(recent, 0.95) * 1000.0 if recent else None}
+            for stage, (n, total, recent) in merged.items()]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+def _print_report(rep: dict) -> None:
+    cfg = rep["config"]
+    print(f"\n{cfg['sessions']} sesiones x {cfg['steps']} pasos en {rep['wall_s']:.1f} s "
+          f"({rep['renders_per_s']:.1f} renders/s)")
+    print(f"\n{'interacción':<12} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'máx ms':>9}")
+    for action, s in rep["latency"].items():
+        print(f"{action:<12} {s['count']:>5} {s['p50_ms']:>9.0f} {s['p95_ms']:>9.0f} {s['max_ms']:>9.0f}")
+    print(f"\nRequests al upstream: {rep['upstream_total']}")
+    for k, n in rep["upstream_calls"].items():
+        print(f"  {k:<40} {n:>6}")
+    print(f"\n{'etapa':<28} {'n':>6} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for st in rep["stages"]:
+        print(f"{st['stage']:<28} {st['n']:>6} {st['total_ms'] / 1000:>9.2f} {st['p50_ms']:>9.1f} {st['p95_ms']:>9.1f}")
+    print("\nCaché por función (hit / stale / miss):")
+    for ns, c in rep["cache"].items():
+        ratio = "—" if c["hit_ratio"] is None else f"{c['hit_ratio']:.1%}"
+        print(f"  {ns.rsplit('.', 1)[-1]:<40} {c['hit']:>5} / {c['stale']:>3} / {c['miss']:>4}  {ratio:>6}")
+    if rep["errors"]:
+        print(f"\n{len(rep['errors'])} errores; primeros:")
+        for e in rep["errors"][:5]:
+            print("  " + e)
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Prueba de carga de proyecto-uv.py con sesiones headless concurrentes.")
+    ap.add_argument("--sessions", type=int, default=10)
+    ap.add_argument("--steps", type=int, default=10, help="interacciones por sesión después del primer render")
+    ap.add_argument("--think-ms", type=float, default=200.0, help="pausa máxima entre interacciones")
+    ap.add_argument("--ramp-ms", type=float, default=50.0, help="separación entre inicios de sesión")
+    ap.add_argument("--latency-ms", type=float, default=100.0, help="latencia del servidor local")
+    ap.add_argument("--jitter-ms", type=float, default=50.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--port", type=int, default=0, help="puerto del servidor local (0 = uno libre)")
+    ap.add_argument("--data-dir", type=Path, default=None, help="almacenes locales (por defecto, temporal y vacío)")
+    ap.add_argument("--cache-backend", choices=("sqlite", "memory"), default="sqlite",
+                    help="sqlite = caché compartida entre sesiones (como réplicas); memory = cada sesión la suya")
+    ap.add_argument("--out", type=Path, default=None, help="reporte JSON")
+    a = ap.parse_args(argv)
+
+    # El entorno debe estar listo ANTES de importar uvnorte (lee endpoints y rutas al importar)
+    port = a.port or _free_port()
+    os.environ["UV_API_BASE"] = f"http://127.0.0.1:{port}"
+    os.environ["UV_DATA_DIR"] = str(a.data_dir or Path(tempfile.mkdtemp(prefix="uv-load-")))
+    os.environ["UV_CACHE_BACKEND"] = a.cache_backend
+    from uvnorte.mockserver import serve
+    server = serve(port=port, latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, error_rate=a.error_rate, seed=a.seed)
+
+    try:
+        rep = run_load(a.sessions, a.steps, a.think_ms, a.ramp_ms, a.seed, server)
+    finally:
+        server.shutdown()
+    _print_report(rep)
+    if a.out:
+        a.out.write_text(json.dumps(rep, indent=2, default=str), encoding="utf-8")
+    return 1 if rep["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Máquina de estados del circuit breaker y salidas de _json_get que deben liberar la prueba.
+#   python -m unittest discover -s tests
+
+import sys
+import time
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from uvnorte import http
+from uvnorte.http import CircuitBreaker, RateLimited
+
+HOST = "breaker.test"
+URL = f"https://{HOST}/v1/forecast"
+
+def _response(status: int, body: bytes = b'{"ok": true}') -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    r.url = URL
+    r.reason = "OK" if status < 400 else "Service Unavailable"
+    return r
+
+class _Client:
+    """Sustituto de http_client(): cada get() consume el siguiente resultado (respuesta o excepción)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def get(self, url, params=None, timeout=None):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_failures_and_probes_once(self):
+        b = CircuitBreaker(failures=2, reset_seconds=0.05)
+        b.record_failure()
+        self.assertEqual(b.state, "closed")
+        b.record_failure()
+        self.assertEqual(b.state, "open")
+        self.assertFalse(b.allow())
+        time.sleep(0.06)
+        self.assertEqual(b.state, "half-open")
+        self.assertTrue(b.allow())
+        self.assertFalse(b.allow())  # una sola prueba a la vez
+        b.record_success()
+        self.assertEqual(b.state, "closed")
+
+    def test_failed_probe_reopens(self):
+        b = CircuitBreaker(failures=1, reset_seconds=0.05)
+        b.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(b.allow())
+        b.record_failure()
+        self.assertEqual(b.state, "open")
+
+    def test_release_frees_probe_without_closing(self):
+        b = CircuitBreaker(failures=1, reset_seconds=0.05)
+        b.record_failure()
+        time.sleep(0.06)
+        self.assertTrue(b.allow())
+        b.release()
+        self.assertEqual(b.state, "half-open")
+        self.assertTrue(b.allow())
+
+class JsonGetProbeTest(unittest.TestCase):
+    """Toda salida de _json_get después de allow() debe resolver la prueba del breaker."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failures=1, reset_seconds=0.05)
+        patches = [
+            mock.patch.object(http, "circuit_breaker", lambda host: self.breaker),
+            mock.patch.object(http, "HTTP_RETRIES", 0),
+            mock.patch.object(http, "HTTP_MODE", ""),
+            mock.patch.object(http, "_last_good", OrderedDict()),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        # breaker abierto y ya en condiciones de probar
+        self.breaker.record_failure()
+        time.sleep(0.06)
+
+    def _get(self, client):
+        with mock.patch.object(http, "http_client", lambda: client):
+            return http._json_get(URL, {"x": 1}, None, ("GET", URL, "test"))
+
+    def test_shed_probe_does_not_wedge_breaker(self):
+        _, err = self._get(_Client(RateLimited("cupo agotado")))
+        self.assertIn("RateLimited", err)
+        data, err = self._get(_Client(_response(200)))
+        self.assertIsNone(err)
+        self.assertEqual(data, {"ok": True})
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_transport_error_on_probe_reopens(self):
+        _, err = self._get(_Client(requests.exceptions.ChunkedEncodingError("cortada")))
+        self.assertIn("ChunkedEncodingError", err)
+        self.assertEqual(self.breaker.state, "open")
+        time.sleep(0.06)
+        data, err = self._get(_Client(_response(200)))
+        self.assertIsNone(err)
+        self.assertEqual(self.breaker.state, "closed")
+
+if __name__ == "__main__":
+    unittest.main()
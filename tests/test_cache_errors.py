@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# cached(is_error=...): los errores no se fijan con la vigencia completa ni pisan el valor anterior de swr.
+#   python -m unittest discover -s tests
+
+import sys
+import time
+import unittest
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uvnorte import cache
+from uvnorte.cache import MemoryCache, cached, get_cache_backend, set_cache_backend
+
+def _wait_revalidation(timeout: float = 2.0) -> None:
+    t0 = time.monotonic()
+    while cache._revalidating and time.monotonic() - t0 < timeout:
+        time.sleep(0.01)
+    time.sleep(0.02)
+
+class CachedErrorTest(unittest.TestCase):
+    def setUp(self):
+        self.previous = get_cache_backend()
+        set_cache_backend(MemoryCache(max_bytes=1 << 20))
+        self.addCleanup(set_cache_backend, self.previous)
+        self.upstream_ok = True
+        self.calls = 0
+
+        def fetch(city: str, run_key: str):
+            self.calls += 1
+            if self.upstream_ok:
+                return f"datos {city} {run_key}", None
+            return None, "Error: upstream caído"
+
+        self.fetch = cached(ttl=3600, swr=True, is_error=lambda r: r[1] is not None,
+                            error_ttl=timedelta(seconds=0.2))(fetch)
+
+    def test_error_keeps_last_good_value(self):
+        self.assertEqual(self.fetch.lookup("Calama", "r1"), (("datos Calama r1", None), False))
+        self.upstream_ok = False
+
+        # r2: valor anterior al instante, el recálculo en segundo plano falla
+        self.assertEqual(self.fetch.lookup("Calama", "r2"), (("datos Calama r1", None), True))
+        _wait_revalidation()
+        # ... y el error no reemplaza al valor anterior (ni en r2 ni en r3)
+        self.assertEqual(self.fetch.lookup("Calama", "r2"), (("datos Calama r1", None), True))
+        self.assertEqual(self.fetch.lookup("Calama", "r3"), (("datos Calama r1", None), True))
+        _wait_revalidation()
+        self.assertEqual(self.fetch.lookup("Calama", "r3"), (("datos Calama r1", None), True))
+
+    def test_error_expires_quickly(self):
+        self.upstream_ok = False
+        self.assertEqual(self.fetch.lookup("Arica", "r1"), ((None, "Error: upstream caído"), False))
+        self.assertEqual(self.fetch.lookup("Arica", "r1"), ((None, "Error: upstream caído"), False))
+        self.assertEqual(self.calls, 1)
+        self.upstream_ok = True
+        time.sleep(0.25)  # vence error_ttl, no la vigencia de una hora
+        self.assertEqual(self.fetch.lookup("Arica", "r1"), (("datos Arica r1", None), False))
+
+if __name__ == "__main__":
+    unittest.main()
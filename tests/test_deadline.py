@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Plazo en curso (request_deadline): recorta timeouts y reintentos de _json_get y pasa a los hilos.
+#   python -m unittest discover -s tests
+
+import sys
+import time
+import unittest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from uvnorte import http
+from uvnorte.http import CircuitBreaker, HttpClient, deadline_remaining, request_deadline, submit_in_context
+
+HOST = "deadline.test"
+URL = f"https://{HOST}/api/dolar"
+
+class _Session:
+    """Sustituto de requests.Session: anota el timeout recibido y responde 503 tras 'delay'."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        r = requests.Response()
+        r.status_code, r.url, r.reason = 503, url, "Service Unavailable"
+        return r
+
+class RequestDeadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failures=100)
+        self.session = _Session(delay=0.05)
+        self.client = HttpClient()
+        patches = [
+            mock.patch.object(http, "circuit_breaker", lambda host: self.breaker),
+            mock.patch.object(http, "http_client", lambda: self.client),
+            mock.patch.object(http, "HTTP_RETRIES", 10),
+            mock.patch.object(http, "HTTP_MODE", ""),
+            mock.patch.object(http, "_last_good", OrderedDict()),
+            mock.patch.object(http, "_backoff", lambda attempt, retry_after=None: 0.2),
+            mock.patch.object(self.client, "session", lambda host: self.session),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_nested_deadline_takes_shortest(self):
+        with request_deadline(30):
+            with request_deadline(2):
+                self.assertLessEqual(deadline_remaining(), 2)
+            self.assertGreater(deadline_remaining(), 2)
+        self.assertIsNone(deadline_remaining())
+
+    def test_retries_and_timeouts_fit_the_deadline(self):
+        t0 = time.monotonic()
+        with request_deadline(1.5):
+            _, err = http._json_get(URL, None, None, ("GET", URL, "test"))
+        elapsed = time.monotonic() - t0
+        self.assertIn("503", err)
+        self.assertLess(elapsed, 1.5)
+        # sin plazo serían 11 intentos; con 1.5 s caben unos pocos y cada timeout cabe en lo que quedaba
+        self.assertLess(len(self.session.timeouts), 11)
+        self.assertTrue(all(read <= 1.5 for _, read in self.session.timeouts))
+
+    def test_no_budget_no_request(self):
+        with request_deadline(0.1):
+            _, err = http._json_get(URL, None, None, ("GET", URL, "test"))
+        self.assertIn("DeadlineExceeded", err)
+        self.assertEqual(self.session.timeouts, [])
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_submit_in_context_carries_deadline(self):
+        with ThreadPoolExecutor(max_workers=1) as pool, request_deadline(5):
+            self.assertIsNone(pool.submit(deadline_remaining).result())
+            self.assertLessEqual(submit_in_context(pool, deadline_remaining).result(), 5)
+
+if __name__ == "__main__":
+    unittest.main()
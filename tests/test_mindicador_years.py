@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Histórico de mindicador: un año pasado se cierra sólo si trajo observaciones o es
+# anterior a la primera observación guardada (un "Sin serie" transitorio no deja hueco).
+#   python -m unittest discover -s tests
+
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+from uvnorte import mindicador
+from uvnorte.config import DATE_DTYPE
+from uvnorte.store import MindicadorStore
+
+HOY = date.today()
+
+def _serie(*days: date) -> pd.DataFrame:
+    return pd.DataFrame({"date": pd.to_datetime(list(days)).astype(DATE_DTYPE), "value": [4.0] * len(days)})
+
+class ClosedYearsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = MindicadorStore(Path(tmp.name) / "mindicador.sqlite")
+        self.responses = {}
+        patches = [
+            mock.patch.object(mindicador, "mindicador_store", lambda: self.store),
+            mock.patch.object(mindicador, "_fetch_mindicador_url", self._fetch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _fetch(self, url: str, indicador: str):
+        year = url.rsplit("/", 1)[-1]
+        df = self.responses.get(int(year) if year.isdigit() else None, pd.DataFrame())
+        return (df, None) if not df.empty else (pd.DataFrame(), f"Sin serie para {indicador}")
+
+    def _history(self, desde: date):
+        # sin la caché: cada llamada consulta el almacén y pide lo que falta
+        return mindicador.fetch_mindicador_history.__wrapped__("libra_cobre", desde)
+
+    def test_transient_empty_year_is_not_closed(self):
+        y = HOY.year - 1
+        self.responses = {y - 1: _serie(date(y - 1, 6, 1)), HOY.year: _serie(date(HOY.year, 1, 2))}
+        self._history(date(y - 1, 1, 1))
+        self.assertEqual(self.store.closed_years("libra_cobre"), {y - 1})
+
+        self.responses[y] = _serie(date(y, 3, 1))
+        df, _ = self._history(date(y - 1, 1, 1))
+        self.assertIn(pd.Timestamp(date(y, 3, 1)), set(df["date"]))
+        self.assertEqual(self.store.closed_years("libra_cobre"), {y - 1, y})
+
+    def test_empty_year_before_new_year_is_not_closed(self):
+        # Primera descarga de una ventana que cruza el año nuevo: el año anterior viene vacío
+        # y el actual con datos. Las observaciones del mismo lote no cierran el año anterior.
+        y = HOY.year - 1
+        self.responses = {HOY.year: _serie(date(HOY.year, 1, 2))}
+        self._history(date(y, 7, 1))
+        self.assertEqual(self.store.closed_years("libra_cobre"), set())
+
+        self.responses[y] = _serie(date(y, 12, 30))
+        df, _ = self._history(date(y, 7, 1))
+        self.assertIn(pd.Timestamp(date(y, 12, 30)), set(df["date"]))
+        self.assertEqual(self.store.closed_years("libra_cobre"), {y})
+
+    def test_years_before_stored_first_observation_are_closed(self):
+        y = HOY.year - 1
+        self.store.save("libra_cobre", _serie(date(y, 6, 1)))  # guardado en una descarga anterior
+        self.responses = {y: _serie(date(y, 6, 1))}
+        self._history(date(y - 2, 1, 1))
+        self.assertEqual(self.store.closed_years("libra_cobre"), {y - 2, y - 1, y})
+
+if __name__ == "__main__":
+    unittest.main()
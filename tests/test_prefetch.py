@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Precarga: wrapper.refresh() recalcula aunque la entrada siga vigente y el scheduler
+# se alinea al cambio de corrida de pronóstico.
+#   python -m unittest discover -s tests
+
+import sys
+import time
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uvnorte import prefetch
+from uvnorte.cache import MemoryCache, cached, get_cache_backend, set_cache_backend
+from uvnorte.prefetch import PrefetchScheduler
+
+class RefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.previous = get_cache_backend()
+        set_cache_backend(MemoryCache(max_bytes=1 << 20))
+        self.addCleanup(set_cache_backend, self.previous)
+
+    def test_refresh_recomputes_fresh_entry(self):
+        calls = []
+
+        @cached(ttl=3600)
+        def fetch(city: str):
+            calls.append(city)
+            return f"{city} #{len(calls)}"
+
+        self.assertEqual(fetch("Iquique"), "Iquique #1")
+        self.assertEqual(fetch("Iquique"), "Iquique #1")  # hit: sin recalcular
+        self.assertEqual(fetch.refresh("Iquique"), "Iquique #2")
+        self.assertEqual(fetch("Iquique"), "Iquique #2")  # la UI lee lo precargado
+        self.assertEqual(len(calls), 2)
+
+class SchedulerAlignmentTest(unittest.TestCase):
+    def test_aligned_task_runs_at_next_forecast_run(self):
+        to_run = timedelta(minutes=7)
+        fake_next = lambda now: now + to_run
+        tasks = {"pronóstico": (360, lambda: None), "cobre": (54, lambda: None)}
+        scheduler = PrefetchScheduler(tasks, run_aligned=("pronóstico",))
+        with mock.patch.object(prefetch, "next_forecast_run", fake_next):
+            t0 = time.monotonic()
+            scheduler.run_task("pronóstico")
+            scheduler.run_task("cobre")
+        expected = to_run.total_seconds() + prefetch.PREFETCH_RUN_DELAY_SECONDS
+        self.assertAlmostEqual(scheduler._next_run["pronóstico"] - t0, expected, delta=1)
+        self.assertAlmostEqual(scheduler._next_run["cobre"] - t0, 54 * 60, delta=1)
+        self.assertIn("pronóstico", scheduler.last_refresh)
+
+if __name__ == "__main__":
+    unittest.main()
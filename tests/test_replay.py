@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Cassettes: se guarda el día de la grabación y today() lo respeta, así las requests con
+# fechas relativas a hoy (past_days, end_date) coinciden al reproducir otro día.
+#   python -m unittest discover -s tests
+
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uvnorte import config
+from uvnorte.replay import Cassette
+
+URL = "https://archive-api.open-meteo.com/v1/archive"
+
+class RecordingDayTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name)
+
+    def test_today_override(self):
+        with mock.patch.object(config, "TODAY_OVERRIDE", "2026-03-01"):
+            self.assertEqual(config.today(), date(2026, 3, 1))
+        with mock.patch.object(config, "TODAY_OVERRIDE", ""):
+            self.assertEqual(config.today(), date.today())
+
+    def test_cassette_records_its_day(self):
+        cas = Cassette(self.path)
+        with mock.patch.object(config, "TODAY_OVERRIDE", "2026-03-01"):
+            cas.save(URL, {"end_date": "2026-02-28"}, {"daily": {}})
+        self.assertEqual(config._recorded_on(self.path), "2026-03-01")
+        self.assertEqual(cas.load(URL, {"end_date": "2026-02-28"}), ({"daily": {}}, None))
+
+if __name__ == "__main__":
+    unittest.main()
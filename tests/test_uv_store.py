@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Almacén del histórico UVI: qué se vuelve a pedir (missing_ranges) según lo guardado (save).
+#   python -m unittest discover -s tests
+
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+
+from uvnorte.config import ARCHIVE_LAG_DAYS, DATE_DTYPE, today
+from uvnorte.store import UVHistoryStore
+
+LOC = UVHistoryStore.loc_key(-20.2133, -70.1503)
+
+def _uv(*days: date) -> pd.DataFrame:
+    return pd.DataFrame({"date": pd.to_datetime(list(days)).astype(DATE_DTYPE), "uv_index_max": [9.5] * len(days)})
+
+class UVHistoryStoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = UVHistoryStore(Path(tmp.name) / "uv_daily.sqlite")
+        self.old = today() - timedelta(days=ARCHIVE_LAG_DAYS + 20)   # ya asentado en archive
+        self.recent = today() - timedelta(days=1)                     # dentro del rezago
+
+    def test_provisional_row_is_requested_again_once_settled(self):
+        # valores de forecast (archive_until=None -> provisorios)
+        self.store.save(LOC, _uv(self.old, self.recent), self.old, self.recent, archive_until=None, complete=True)
+        self.assertEqual(self.store.load(LOC, self.old, self.old)["final"].tolist(), [0])
+        # el día viejo ya debería estar en archive: se vuelve a pedir; el reciente todavía no
+        self.assertEqual(self.store.missing_ranges(LOC, self.old, self.old), [(self.old, self.old)])
+        self.assertEqual(self.store.missing_ranges(LOC, self.recent, self.recent), [])
+
+    def test_settled_empty_day_is_not_requested_again(self):
+        end = self.old + timedelta(days=2)
+        # descarga completa con un día sin valor en medio: queda guardado como NULL final
+        self.store.save(LOC, _uv(self.old, end), self.old, end, archive_until=end, complete=True)
+        have = self.store.load(LOC, self.old, end)
+        self.assertEqual(have["final"].tolist(), [1, 1, 1])
+        self.assertTrue(pd.isna(have["uv_index_max"].iloc[1]))
+        self.assertEqual(self.store.missing_ranges(LOC, self.old, end), [])
+
+    def test_incomplete_fetch_marks_nothing_final(self):
+        end = self.old + timedelta(days=2)
+        # descarga con error (p. ej. un tramo de archive falló): sólo se guarda lo que llegó
+        self.store.save(LOC, _uv(self.old), self.old, end, archive_until=None, complete=False)
+        self.assertEqual(self.store.load(LOC, self.old, end)["date"].dt.date.tolist(), [self.old])
+        self.assertEqual(self.store.missing_ranges(LOC, self.old, end), [(self.old, end)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# uvnorte: descarga y caché de datos UVI (Open-Meteo) y cobre (mindicador.cl), sin Streamlit.
+# La app (proyecto-uv.py) es sólo la capa de presentación; scripts y workers pueden
+# importar estas funciones directamente y compartir el mismo backend de caché.
+
+from .cache import (CacheBackend, MemoryCache, SQLiteCache, TieredCache, cache_counters, cache_run_key,
+                    cached, forecast_run_key, get_cache_backend, set_cache_backend)
+from .config import CIUDADES, NORTE_GRANDE_CITIES, UV_WINDOW_DAYS, today
+from .engine import RENDER_DEADLINE_SECONDS, fetch_render, fetch_render_async, plan_render
+from .frames import city_slice, clip_by_date, compute_top_days, last_value, slice_sorted
+from .http import HttpClient, breaker_states, http_client
+from .metrics import DEBUG_PANEL, METRICS_PORT, Metrics, metrics, span, start_metrics_server, timed
+from .mindicador import (COBRE_MAX_DIAS, cobre_clp_asof, fetch_cobre_usd_and_usdclp,
+                         fetch_mindicador_history, fetch_mindicador_many, fetch_mindicador_series)
+from .prefetch import PREFETCH_ENABLED, PrefetchScheduler, prefetch_scheduler
+from .uv import (FORECAST_MAX_DAYS, fetch_uv_daily_multi, fetch_uv_daily_smart,
+                 fetch_uv_forecast_hourly, fetch_uv_forecast_hourly_multi)
+
+__all__ = [
+    "CIUDADES",
+    "COBRE_MAX_DIAS",
+    "CacheBackend",
+    "DEBUG_PANEL",
+    "FORECAST_MAX_DAYS",
+    "HttpClient",
+    "METRICS_PORT",
+    "MemoryCache",
+    "Metrics",
+    "NORTE_GRANDE_CITIES",
+    "PREFETCH_ENABLED",
+    "PrefetchScheduler",
+    "RENDER_DEADLINE_SECONDS",
+    "SQLiteCache",
+    "TieredCache",
+    "UV_WINDOW_DAYS",
+    "breaker_states",
+    "cache_counters",
+    "cache_run_key",
+    "cached",
+    "city_slice",
+    "clip_by_date",
+    "cobre_clp_asof",
+    "compute_top_days",
+    "fetch_cobre_usd_and_usdclp",
+    "fetch_mindicador_history",
+    "fetch_mindicador_many",
+    "fetch_mindicador_series",
+    "fetch_render",
+    "fetch_render_async",
+    "fetch_uv_daily_multi",
+    "fetch_uv_daily_smart",
+    "fetch_uv_forecast_hourly",
+    "fetch_uv_forecast_hourly_multi",
+    "forecast_run_key",
+    "get_cache_backend",
+    "http_client",
+    "last_value",
+    "metrics",
+    "plan_render",
+    "prefetch_scheduler",
+    "set_cache_backend",
+    "slice_sorted",
+    "span",
+    "start_metrics_server",
+    "timed",
+    "today",
+]
@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+# Caché de resultados con backend intercambiable, single-flight y política de vigencia.
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Protocol
+
+import pandas as pd
+
+from .config import ARCHIVE_LAG_DAYS, DATA_DIR, today
+
+# =============================
+# POLÍTICA DE CACHÉ
+# =============================
+# - Pronósticos: la entrada vale mientras no se publique una nueva corrida del modelo.
+#   Las funciones cacheadas reciben 'run_key' (corrida vigente) como parte de la llave.
+# - Histórico ya asentado en archive (más antiguo que el rezago): inmutable, sin vencimiento.
+FORECAST_UPDATE_HOURS = 1        # Open-Meteo publica corridas nuevas ~cada hora
+FORECAST_TTL = timedelta(hours=FORECAST_UPDATE_HOURS)
+MINDICADOR_TTL = timedelta(hours=1)
+SETTLED_RUN_KEY = "archive"
+# Resultados con error (los fetchers devuelven el error como valor): vigencia corta para
+# reintentar pronto, y nunca reemplazan al último valor bueno de stale-while-revalidate
+CACHE_ERROR_TTL = timedelta(minutes=1)
+
+# Stale-while-revalidate: valor vencido servido al instante mientras se recalcula en segundo plano
+SWR_MAX_STALE = timedelta(days=1)   # cuánto tiempo se puede servir un valor vencido
+SWR_VERSION_ARG = "run_key"         # argumento de versión que no distingue al valor "anterior"
+SWR_NAMESPACE_SUFFIX = "#stale"
+SWR_WORKERS = 2
+
+# Tamaño de las cachés: tope de entradas por función + presupuesto total de memoria (LRU)
+CACHE_MAX_ENTRIES = int(os.environ.get("UV_CACHE_MAX_ENTRIES", 64))
+CACHE_MEMORY_BUDGET_MB = float(os.environ.get("UV_CACHE_BUDGET_MB", 256))
+
+# Caché compartida entre réplicas (UV_CACHE_BACKEND=sqlite): archivo común + memoria local delante
+CACHE_BACKEND = os.environ.get("UV_CACHE_BACKEND", "memory").lower()
+CACHE_PATH = Path(os.environ.get("UV_CACHE_PATH", DATA_DIR / "cache.sqlite"))
+CACHE_SHARED_BUDGET_MB = float(os.environ.get("UV_CACHE_SHARED_BUDGET_MB", 1024))
+CACHE_LOCAL_TTL_SECONDS = 300
+CACHE_COMPRESS_LEVEL = 6
+
+def forecast_run_key(now: datetime | None = None) -> str:
+    """Inicio (UTC) de la corrida de pronóstico vigente; cambia en cada actualización del modelo."""
+    now = now or datetime.now(timezone.utc)
+    hour = now.hour - now.hour % FORECAST_UPDATE_HOURS
+    return now.replace(hour=hour, minute=0, second=0, microsecond=0).isoformat()
+
+def next_forecast_run(now: datetime | None = None) -> datetime:
+    """Instante (UTC) en que forecast_run_key() pasa a la corrida siguiente."""
+    return datetime.fromisoformat(forecast_run_key(now)) + timedelta(hours=FORECAST_UPDATE_HOURS)
+
+def cache_run_key(end: date) -> str:
+    """Llave de vigencia para un rango diario: fija si todo el rango ya está asentado en archive."""
+    if end <= today() - timedelta(days=ARCHIVE_LAG_DAYS):
+        return SETTLED_RUN_KEY
+    return forecast_run_key()
+
+# =============================
+# SINGLE-FLIGHT (coalescer llamadas concurrentes idénticas)
+# =============================
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+class SingleFlight:
+    """
+    Llamadas concurrentes con la misma llave esperan a UNA sola ejecución en curso y
+    comparten su resultado (evita la estampida de sesiones contra la misma API).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+# Registro de llamadas en curso compartido por todo el proceso
+flights = SingleFlight()
+
+def _normalize_key(value):
+    """Forma canónica y hashable de los parámetros de una request."""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize_key(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_key(v) for v in value)
+    return value
+
+def _nbytes(obj) -> int:
+    """Tamaño aproximado en memoria de un resultado cacheado (DataFrames + contenedores)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (tuple, list)):
+        return sum(_nbytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(v) for v in obj.values())
+    return sys.getsizeof(obj)
+
+# =============================
+# BACKENDS
+# =============================
+class CacheBackend(Protocol):
+    """
+    Interfaz mínima de un backend de caché. 'namespace' identifica la función cacheada
+    y 'key' sus argumentos normalizados; 'ttl' en segundos (None = sin vencimiento).
+    """
+
+    def get(self, namespace: str, key: str) -> tuple[bool, object]: ...
+
+    def set(self, namespace: str, key: str, value, ttl: float | None = None,
+            max_entries: int | None = None) -> None: ...
+
+    def clear(self, namespace: str | None = None) -> None: ...
+
+class MemoryCache:
+    """
+    Backend por defecto: memoria del proceso, compartida por todas las sesiones.
+    LRU global con presupuesto de bytes, TTL por entrada y tope de entradas por función.
+    Los valores se devuelven por referencia (sin copiar): no deben mutarse.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data: OrderedDict = OrderedDict()            # (ns, key) -> (valor, vence, bytes)
+        self._by_ns: dict[str, OrderedDict] = {}           # ns -> llaves en orden LRU
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> tuple[bool, object]:
+        with self._lock:
+            item = self._data.get((namespace, key))
+            if item is None:
+                return False, None
+            value, expires, _ = item
+            if expires is not None and time.monotonic() >= expires:
+                self._drop((namespace, key))
+                return False, None
+            self._data.move_to_end((namespace, key))
+            self._by_ns[namespace].move_to_end(key)
+            return True, value
+
+    def set(self, namespace: str, key: str, value, ttl: float | None = None,
+            max_entries: int | None = None) -> None:
+        nbytes = _nbytes(value)
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if (namespace, key) in self._data:
+                self._drop((namespace, key))
+            self._data[(namespace, key)] = (value, expires, nbytes)
+            self._by_ns.setdefault(namespace, OrderedDict())[key] = None
+            self.total_bytes += nbytes
+            keys = self._by_ns[namespace]
+            while max_entries and len(keys) > max_entries:
+                self._drop((namespace, next(iter(keys))))
+            while self.total_bytes > self.max_bytes and len(self._data) > 1:
+                self._drop(next(iter(self._data)))
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._lock:
+            targets = list(self._data) if namespace is None else [(namespace, k) for k in self._by_ns.get(namespace, ())]
+            for item in targets:
+                self._drop(item)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+    def _drop(self, item) -> None:
+        _, _, nbytes = self._data.pop(item)
+        self.total_bytes -= nbytes
+        namespace, key = item
+        self._by_ns[namespace].pop(key, None)
+
+class SQLiteCache:
+    """
+    Backend compartido entre procesos (réplicas detrás de un balanceador en el mismo host
+    o con un volumen común): un archivo SQLite con los resultados serializados con pickle
+    y comprimidos con zlib. TTL con reloj de pared, para que todos los procesos coincidan.
+    """
+
+    def __init__(self, path: Path, max_bytes: int | None = None, level: int = CACHE_COMPRESS_LEVEL):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.level = level
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, nbytes INTEGER NOT NULL,"
+                " expires REAL, accessed REAL NOT NULL, PRIMARY KEY (ns, key))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, namespace: str, key: str) -> tuple[bool, object]:
+        now = time.time()
+        with self._connect() as con:
+            row = con.execute("SELECT value, expires FROM cache WHERE ns = ? AND key = ?",
+                              (namespace, key)).fetchone()
+            if row is None:
+                return False, None
+            blob, expires = row
+            if expires is not None and now >= expires:
+                con.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (namespace, key))
+                return False, None
+            con.execute("UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?", (now, namespace, key))
+        try:
+            return True, pickle.loads(zlib.decompress(blob))
+        except Exception:
+            return False, None  # entrada corrupta o de otra versión: se trata como miss
+
+    def set(self, namespace: str, key: str, value, ttl: float | None = None,
+            max_entries: int | None = None) -> None:
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.level)
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, nbytes, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, blob, len(blob), expires, now),
+            )
+            con.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            if max_entries:
+                con.execute(
+                    "DELETE FROM cache WHERE ns = ? AND key NOT IN"
+                    " (SELECT key FROM cache WHERE ns = ? ORDER BY accessed DESC LIMIT ?)",
+                    (namespace, namespace, max_entries),
+                )
+            if self.max_bytes:
+                # LRU global sobre el tamaño comprimido
+                con.execute(
+                    "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM ("
+                    " SELECT rowid, SUM(nbytes) OVER (ORDER BY accessed DESC) AS acc FROM cache"
+                    ") WHERE acc > ?)",
+                    (self.max_bytes,),
+                )
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._connect() as con:
+            if namespace is None:
+                con.execute("DELETE FROM cache")
+            else:
+                con.execute("DELETE FROM cache WHERE ns = ?", (namespace,))
+
+    def stats(self) -> dict:
+        with self._connect() as con:
+            entries, nbytes = con.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM cache").fetchone()
+        return {"entries": entries, "bytes": nbytes, "max_bytes": self.max_bytes}
+
+class TieredCache:
+    """
+    Memoria local delante de un backend compartido: los hits repetidos de una réplica no
+    pagan la descompresión, y lo que calcula cualquier réplica queda disponible para todas.
+    Las copias locales viven a lo más 'local_ttl' segundos (acota cuánto puede divergir
+    una réplica tras un clear() hecho en otra).
+    """
+
+    def __init__(self, local: CacheBackend, shared: CacheBackend, local_ttl: float = CACHE_LOCAL_TTL_SECONDS):
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+    def get(self, namespace: str, key: str) -> tuple[bool, object]:
+        hit, value = self.local.get(namespace, key)
+        if hit:
+            return hit, value
+        hit, value = self.shared.get(namespace, key)
+        if hit:
+            self.local.set(namespace, key, value, self.local_ttl)
+        return hit, value
+
+    def set(self, namespace: str, key: str, value, ttl: float | None = None,
+            max_entries: int | None = None) -> None:
+        self.shared.set(namespace, key, value, ttl, max_entries)
+        local_ttl = self.local_ttl if ttl is None else min(ttl, self.local_ttl)
+        self.local.set(namespace, key, value, local_ttl, max_entries)
+
+    def clear(self, namespace: str | None = None) -> None:
+        self.shared.clear(namespace)
+        self.local.clear(namespace)
+
+    def stats(self) -> dict:
+        return {"local": self.local.stats(), "shared": self.shared.stats()}
+
+def _default_backend() -> CacheBackend:
+    """Backend según UV_CACHE_BACKEND: 'memory' (por defecto) o 'sqlite' (compartido entre procesos)."""
+    memory = MemoryCache(int(CACHE_MEMORY_BUDGET_MB * 1024 * 1024))
+    if CACHE_BACKEND == "sqlite":
+        shared = SQLiteCache(CACHE_PATH, max_bytes=int(CACHE_SHARED_BUDGET_MB * 1024 * 1024))
+        return TieredCache(memory, shared)
+    return memory
+
+_backend: CacheBackend | None = None
+_backend_lock = threading.Lock()
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Reemplaza el backend de caché del proceso (p. ej. uno compartido entre réplicas)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+def get_cache_backend() -> CacheBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _default_backend()
+        return _backend
+
+# =============================
+# DECORADOR
+# =============================
+# Contadores por función cacheada: hit (entrada vigente), stale (servida vencida), miss
+_counters: dict[str, dict[str, int]] = {}
+_counters_lock = threading.Lock()
+
+def _count(namespace: str, outcome: str) -> None:
+    with _counters_lock:
+        c = _counters.setdefault(namespace, {"hit": 0, "stale": 0, "miss": 0})
+        c[outcome] += 1
+
+def cache_counters() -> dict[str, dict[str, int]]:
+    """Copia de los contadores {función: {'hit', 'stale', 'miss'}} desde el inicio del proceso."""
+    with _counters_lock:
+        return {ns: dict(c) for ns, c in _counters.items()}
+
+def _make_key(args: tuple, kwargs: dict) -> str:
+    return hashlib.sha1(repr(_normalize_key((args, kwargs))).encode("utf-8")).hexdigest()
+
+def cached(ttl: timedelta | float | None = None, max_entries: int | None = CACHE_MAX_ENTRIES,
+           swr: bool = False, is_error=None, error_ttl: timedelta = CACHE_ERROR_TTL):
+    """
+    Decorador: memoiza el resultado en el backend activo. En un miss, las llamadas
+    concurrentes con los mismos argumentos esperan a una sola ejecución (single-flight).
+
+    swr=True (stale-while-revalidate): si la entrada venció (TTL) o cambió 'run_key', se
+    devuelve al instante el último valor calculado para los mismos argumentos (sin contar
+    'run_key') y se recalcula en segundo plano. wrapper.lookup(...) -> (valor, stale).
+
+    is_error(valor) -> bool marca los resultados fallidos: se guardan sólo 'error_ttl' y no
+    pasan a ser el valor anterior de swr; mientras dure el error se sirve ese valor anterior.
+
+    wrapper.refresh(...) recalcula y guarda aunque la entrada siga vigente (precarga).
+    """
+    ttl_s = ttl.total_seconds() if isinstance(ttl, timedelta) else ttl
+    error_ttl_s = error_ttl.total_seconds() if ttl_s is None else min(ttl_s, error_ttl.total_seconds())
+
+    def deco(fn):
+        namespace = f"{fn.__module__}.{fn.__qualname__}"
+        stale_ns = namespace + SWR_NAMESPACE_SUFFIX
+        signature = inspect.signature(fn)
+
+        def base_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.arguments.pop(SWR_VERSION_ARG, None)
+            return _make_key((), dict(bound.arguments))
+
+        def compute(key, args, kwargs, force=False):
+            backend = get_cache_backend()
+            if not force:
+                hit, value = backend.get(namespace, key)  # otro hilo pudo haberlo guardado recién
+                if hit:
+                    return value
+            value = fn(*args, **kwargs)
+            if is_error is not None and is_error(value):
+                backend.set(namespace, key, value, error_ttl_s, max_entries)
+                return value
+            backend.set(namespace, key, value, ttl_s, max_entries)
+            if swr:
+                backend.set(stale_ns, base_key(args, kwargs), value, SWR_MAX_STALE.total_seconds(), max_entries)
+            return value
+
+        def lookup(*args, **kwargs) -> tuple[object, bool]:
+            key = _make_key(args, kwargs)
+            backend = get_cache_backend()
+            hit, value = backend.get(namespace, key)
+            failed = hit and is_error is not None and is_error(value)
+            if hit and not (swr and failed):
+                _count(namespace, "hit")
+                return value, False
+            if swr:
+                stale_hit, stale_value = backend.get(stale_ns, base_key(args, kwargs))
+                if stale_hit:
+                    _count(namespace, "stale")
+                    if not hit:  # con un error aún vigente no se reintenta hasta que venza
+                        _revalidate((namespace, key), compute, key, args, kwargs)
+                    return stale_value, True
+                if hit:
+                    _count(namespace, "hit")
+                    return value, False
+            _count(namespace, "miss")
+            return flights.do((namespace, key), compute, key, args, kwargs), False
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return lookup(*args, **kwargs)[0]
+
+        def refresh(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            return flights.do((namespace, key), compute, key, args, kwargs, True)
+
+        def clear():
+            get_cache_backend().clear(namespace)
+            get_cache_backend().clear(stale_ns)
+
+        wrapper.lookup = lookup
+        wrapper.refresh = refresh
+        wrapper.clear = clear
+        return wrapper
+
+    return deco
+
+# -----------------------------
+# Recalculo en segundo plano (stale-while-revalidate)
+# -----------------------------
+_revalidator = ThreadPoolExecutor(max_workers=SWR_WORKERS, thread_name_prefix="uv-swr")
+_revalidating: set = set()
+_revalidating_lock = threading.Lock()
+
+def _revalidate(flight_key, compute, key, args, kwargs) -> None:
+    """Encola UN recálculo por llave; las sesiones siguientes siguen leyendo el valor anterior."""
+    with _revalidating_lock:
+        if flight_key in _revalidating:
+            return
+        _revalidating.add(flight_key)
+
+    def run():
+        try:
+            flights.do(flight_key, compute, key, args, kwargs)
+        except Exception:
+            pass  # el próximo lookup lo reintenta (y verá el error si persiste)
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(flight_key)
+
+    _revalidator.submit(run)
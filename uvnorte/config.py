@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Configuración compartida: ciudades, endpoints, rutas locales y tipos compactos.
+# Los valores ajustables por despliegue se leen de variables de entorno UV_*.
+
+import os
+from datetime import date
+from pathlib import Path
+
+# -----------------------------
+# Ciudades del Norte Grande
+# -----------------------------
+NORTE_GRANDE_CITIES = {
+    "Arica": (-18.4783, -70.3126),
+    "Iquique": (-20.2133, -70.1503),
+    "Antofagasta": (-23.6500, -70.4000),
+    "Calama": (-22.4550, -68.9290),
+    "San Pedro de Atacama": (-22.9110, -68.2030),
+    "Tocopilla": (-22.0887, -70.1936),
+}
+
+CIUDADES = tuple(NORTE_GRANDE_CITIES.keys())
+
+UV_WINDOW_DAYS = 180  # ventana fija del histórico UVI (6 meses hacia atrás desde 'fin')
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+# UV_API_BASE apunta todos los endpoints a un servidor local (python -m uvnorte.mockserver);
+# cada uno se puede sobrescribir por separado con su propia variable.
+_API_BASE = os.environ.get("UV_API_BASE", "").rstrip("/")
+OPEN_METEO_ARCHIVE = os.environ.get("UV_OPEN_METEO_ARCHIVE_URL") or (
+    f"{_API_BASE}/v1/archive" if _API_BASE else "https://archive-api.open-meteo.com/v1/archive")
+OPEN_METEO_FORECAST = os.environ.get("UV_OPEN_METEO_FORECAST_URL") or (
+    f"{_API_BASE}/v1/forecast" if _API_BASE else "https://api.open-meteo.com/v1/forecast")
+MINDICADOR_BASE = os.environ.get("UV_MINDICADOR_URL") or (
+    f"{_API_BASE}/api" if _API_BASE else "https://mindicador.cl/api")
+
+# Formato de 'time' en las requests diarias: 'unixtime' (enteros, respuesta más chica y sin
+# parseo de strings) o 'iso8601' (el de la API). Las horarias van en iso8601: convertir
+# unixtime a hora local con horario de verano cuesta más que parsear el ISO de formato fijo.
+OPEN_METEO_TIMEFORMAT = os.environ.get("UV_OPEN_METEO_TIMEFORMAT", "unixtime")
+
+# Grabación / reproducción de respuestas (UV_HTTP_MODE = "record" | "replay"; vacío = red normal)
+HTTP_MODE = os.environ.get("UV_HTTP_MODE", "").lower()
+
+ARCHIVE_LAG_DAYS = 5             # archive (reanálisis) suele ir ~5 días atrás de hoy
+
+# -----------------------------
+# Almacenes locales (SQLite)
+# -----------------------------
+DATA_DIR = Path(os.environ.get("UV_DATA_DIR", Path(__file__).resolve().parent.parent / ".uv_data"))
+UV_STORE_ENABLED = os.environ.get("UV_STORE", "1") != "0"
+CASSETTE_DIR = Path(os.environ.get("UV_CASSETTE_DIR", DATA_DIR / "cassettes"))
+CASSETTE_RECORDED_ON = "recorded_on.txt"   # día de la grabación, dentro de CASSETTE_DIR
+
+# -----------------------------
+# Fecha de "hoy"
+# -----------------------------
+# Las fechas de las requests (start_date, end_date, past_days, años de mindicador) salen de
+# today(). UV_TODAY=AAAA-MM-DD la fija; en modo replay, por defecto es el día de la grabación,
+# así un cassette se puede reproducir cualquier otro día.
+def _recorded_on(cassette_dir: Path) -> str:
+    f = cassette_dir / CASSETTE_RECORDED_ON
+    return f.read_text(encoding="utf-8").strip() if f.exists() else ""
+
+TODAY_OVERRIDE = os.environ.get("UV_TODAY") or (_recorded_on(CASSETTE_DIR) if HTTP_MODE == "replay" else "")
+
+def today() -> date:
+    return date.fromisoformat(TODAY_OVERRIDE) if TODAY_OVERRIDE else date.today()
+
+# -----------------------------
+# Representación compacta de los DataFrames cacheados
+# -----------------------------
+DATE_DTYPE = "datetime64[s]"   # pandas no admite resolución diaria; segundos es la menor
+UV_DTYPE = "float32"
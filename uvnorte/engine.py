@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Motor de descarga de una página completa: planifica las llamadas que necesita el estado
+# actual de la barra lateral y las ejecuta concurrentemente (hilos) bajo un plazo global.
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+
+import pandas as pd
+
+from .http import DEADLINE_MARGIN_SECONDS, call_with_deadline
+from .metrics import span
+from .mindicador import fetch_cobre_usd_and_usdclp
+from .uv import fetch_uv_daily_multi, fetch_uv_forecast_hourly_multi
+
+RENDER_DEADLINE_SECONDS = float(os.environ.get("UV_RENDER_DEADLINE_S", 45))
+
+def plan_render(cities: tuple[str, ...], uv_start: date, uv_end: date, forecast_days: int) -> dict:
+    """
+    Llamadas necesarias para un render: nombre -> (función, args, resultado si no alcanza).
+    El resultado de respaldo tiene la misma forma que el de la función (la UI no distingue).
+    """
+    cities = tuple(cities)
+    return {
+        "historico": (
+            fetch_uv_daily_multi, (cities, uv_start, uv_end),
+            lambda msg: (pd.DataFrame(columns=["city", "date", "uv_index_max"]), {c: msg for c in cities}, {}),
+        ),
+        "pronostico": (
+            fetch_uv_forecast_hourly_multi, (cities, forecast_days),
+            lambda msg: (pd.DataFrame(), msg),
+        ),
+        "cobre": (
+            fetch_cobre_usd_and_usdclp, (),
+            lambda msg: (pd.DataFrame(), pd.DataFrame(), {"error": msg}),
+        ),
+    }
+
+def fetch_render(plan: dict, deadline: float = RENDER_DEADLINE_SECONDS) -> dict:
+    """
+    Ejecuta todas las llamadas del plan a la vez: la latencia del render es la de la más
+    lenta (no la suma). Devuelve {nombre: resultado}; lo que no termina dentro del plazo
+    queda con su resultado de respaldo (los errores se cachean poco, el próximo render reintenta).
+    """
+    # Los fetchers son bloqueantes (requests + cachés con lock): cada uno corre en su hilo.
+    # Sus requests (timeouts y reintentos) quedan acotadas por el mismo plazo, con holgura
+    # para devolver el resultado a tiempo.
+    budget = max(0.0, deadline - DEADLINE_MARGIN_SECONDS)
+    pool = ThreadPoolExecutor(max_workers=max(1, len(plan)), thread_name_prefix="uv-render")
+    try:
+        with span("render.fetch"):
+            futures = {name: pool.submit(call_with_deadline, budget, fn, *args)
+                       for name, (fn, args, _) in plan.items()}
+            done, _ = wait(futures.values(), timeout=deadline)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    out = {}
+    for name, fut in futures.items():
+        _, _, fallback = plan[name]
+        if fut not in done:
+            out[name] = fallback(f"Sin respuesta en {deadline:g} s")
+            continue
+        try:
+            out[name] = fut.result()
+        except Exception as e:
+            out[name] = fallback(f"{type(e).__name__}: {e}")
+    return out
+
+async def fetch_render_async(plan: dict, deadline: float = RENDER_DEADLINE_SECONDS) -> dict:
+    """fetch_render para código con event loop propio (workers async, notebooks): no lo bloquea."""
+    return await asyncio.to_thread(fetch_render, plan, deadline)
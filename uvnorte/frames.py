@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Conversión de respuestas a DataFrames y utilidades de recorte sobre series ordenadas.
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from .config import DATE_DTYPE, UV_DTYPE
+from .metrics import timed
+
+def _time_array(times: list, tz: str | None = None, utc_offset: int = 0, daily: bool = False) -> np.ndarray:
+    """
+    'time' de Open-Meteo -> datetime64[s] en hora local, sin zona.
+    iso8601: 'YYYY-MM-DD' o 'YYYY-MM-DDTHH:MM', formato fijo que NumPy parsea directo;
+    unixtime: segundos UTC de la hora local. Los días se redondean al día más cercano
+    (utc_offset_seconds es el offset actual: con horario de verano de por medio la
+    medianoche llega corrida en ±1 h); las horas se convierten con la zona de la respuesta.
+    """
+    if not times or not isinstance(times[0], (int, float)):
+        return np.asarray(times, dtype=DATE_DTYPE)
+    secs = np.asarray(times, dtype="int64")
+    if daily:
+        return ((secs + int(utc_offset) + 43200) // 86400).astype("datetime64[D]").astype(DATE_DTYPE)
+    if tz and tz not in ("GMT", "UTC"):
+        try:
+            idx = pd.DatetimeIndex(secs.astype(DATE_DTYPE), tz="UTC").tz_convert(tz)
+            return idx.tz_localize(None).to_numpy(DATE_DTYPE)
+        except Exception:
+            pass  # zona desconocida para esta instalación: offset fijo
+    return (secs + int(utc_offset)).astype(DATE_DTYPE)
+
+def _float_array(values: list | None, n: int) -> np.ndarray:
+    """Lista JSON de números -> float32, con NaN para null (y para lo no numérico)."""
+    if values is None:
+        return np.full(n, np.nan, dtype=UV_DTYPE)
+    try:
+        return np.asarray(values, dtype=UV_DTYPE)
+    except (TypeError, ValueError):
+        return pd.to_numeric(values, errors="coerce").astype(UV_DTYPE)
+
+def _series_frame(d: dict, block: str, var: str, time_col: str) -> pd.DataFrame:
+    """Bloque daily/hourly de una respuesta -> DataFrame [time_col, var] sin nulos, ordenado."""
+    t = _time_array(d[block]["time"], d.get("timezone"), d.get("utc_offset_seconds", 0), daily=block == "daily")
+    v = _float_array(d[block].get(var), len(t))
+    keep = ~np.isnan(v)
+    t, v = t[keep], v[keep]
+    # Open-Meteo ya entrega en orden: sólo se ordena si hace falta
+    if len(t) > 1 and (t[1:] < t[:-1]).any():
+        order = np.argsort(t, kind="stable")
+        t, v = t[order], v[order]
+    return pd.DataFrame({time_col: t, var: v})
+
+@timed("parse.uv_daily")
+def _uv_json_to_df(d: dict) -> pd.DataFrame:
+    """Convierte respuesta Open-Meteo (daily) -> DataFrame ordenado ascendente."""
+    if not d or "daily" not in d or "time" not in d["daily"]:
+        return pd.DataFrame()
+    return _series_frame(d, "daily", "uv_index_max", "date")
+
+@timed("parse.uv_hourly")
+def _hourly_json_to_df(d: dict) -> pd.DataFrame:
+    """Convierte respuesta Open-Meteo (hourly) -> DataFrame [time, uv_index] ordenado."""
+    return _series_frame(d, "hourly", "uv_index", "time")
+
+@timed("parse.mindicador")
+def _mindicador_serie_to_df(serie: list[dict]) -> pd.DataFrame:
+    """Convierte 'serie' de mindicador.cl -> DataFrame [date, value] ordenado ascendente."""
+    df = pd.DataFrame({
+        # fecha viene en UTC (medianoche de Chile): se deja sólo el día, sin zona horaria
+        "date": pd.to_datetime([s.get("fecha") for s in serie], errors="coerce", utc=True)
+                  .tz_convert(None).normalize().astype(DATE_DTYPE),
+        "value": pd.to_numeric([s.get("valor") for s in serie], errors="coerce")
+    }).dropna()
+    return df.sort_values("date").reset_index(drop=True)
+
+def slice_sorted(df: pd.DataFrame, start: date, end: date, col: str = "date") -> pd.DataFrame:
+    """
+    Filas con start <= df[col] <= end (días completos) de un DataFrame ORDENADO por 'col'.
+    Búsqueda binaria (O(log n)) y recorte posicional: devuelve una vista, sin copiar datos.
+    """
+    if df.empty:
+        return df
+    lo = df[col].searchsorted(pd.Timestamp(start), side="left")
+    hi = df[col].searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1), side="left")
+    return df.iloc[lo:hi]
+
+def last_date(df: pd.DataFrame, col: str = "date") -> date:
+    """Último día de un DataFrame ordenado por 'col' (sin recorrer la serie)."""
+    return df[col].iloc[-1].date()
+
+def clip_by_date(df: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+    return slice_sorted(df, start, end)
+
+def city_slice(df: pd.DataFrame, city: str) -> pd.DataFrame:
+    """Filtra un DataFrame largo (columna 'city') a una ciudad, sin la columna 'city'."""
+    if df.empty or "city" not in df.columns:
+        return pd.DataFrame()
+    return df.loc[df["city"] == city].drop(columns="city").reset_index(drop=True)
+
+# -----------------------------
+# Auxiliar: Top N días UVI
+# -----------------------------
+def compute_top_days(df: pd.DataFrame, n: int = 5) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    df["uv_index_max"] = pd.to_numeric(df["uv_index_max"], errors="coerce")
+    df = df.dropna(subset=["uv_index_max"])
+    return df.nlargest(n, "uv_index_max")[["date", "uv_index_max"]]
+
+def last_value(df: pd.DataFrame) -> tuple[datetime | None, float | None]:
+    if df is None or df.empty:
+        return None, None
+    row = df.iloc[-1]
+    return (row["date"].to_pydatetime() if isinstance(row["date"], pd.Timestamp) else None,
+            float(row["value"]))
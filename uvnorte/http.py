@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+# Cliente HTTP compartido (keep-alive por host) y GET -> JSON con reintentos y circuit breaker.
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json de la biblioteca estándar
+    orjson = None
+
+from .cache import _normalize_key, flights
+from .config import HTTP_MODE
+from .metrics import metrics, span
+from .replay import cassette
+
+# Tamaño del pool de conexiones por host (conexiones reutilizables simultáneas)
+HTTP_POOL_SIZES = {
+    "archive-api.open-meteo.com": 8,
+    "api.open-meteo.com": 8,
+    "mindicador.cl": 4,
+}
+HTTP_POOL_DEFAULT = 4
+HTTP_TIMINGS_MAX = 500  # últimas N requests con su tiempo
+
+def _loads(raw: bytes):
+    """Decodifica el cuerpo JSON directo desde bytes (orjson si está instalado)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+# Cupo de requests por host (token bucket): requests/segundo sostenidas y ráfaga máxima.
+# Por proceso: con N réplicas, configurar cada una con ~1/N del cupo del proveedor.
+# UV_RATE_LIMITS="host=rate:burst,..." reemplaza valores; rate 0 = sin límite.
+RATE_LIMITS = {
+    "archive-api.open-meteo.com": (5.0, 10),
+    "api.open-meteo.com": (5.0, 10),
+    "mindicador.cl": (2.0, 4),
+}
+RATE_MAX_WAIT_SECONDS = float(os.environ.get("UV_RATE_MAX_WAIT_S", 10))  # más espera que esto: se descarta
+
+def _rate_limits_from_env(defaults: dict, spec: str | None) -> dict[str, tuple[float, int]]:
+    limits = dict(defaults)
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        host, _, value = item.strip().partition("=")
+        rate, _, burst = value.partition(":")
+        limits[host] = (float(rate), int(burst or max(1, float(rate))))
+    return limits
+
+class RateLimited(Exception):
+    """El cupo del host no alcanza dentro de la espera máxima: la request se descarta sin enviarla."""
+
+class TokenBucket:
+    """
+    Token bucket con reservas: cada request toma un token; si no hay, reserva el próximo
+    y espera su turno (cola FIFO implícita). Si la espera superaría 'max_wait', se descarta.
+    """
+
+    def __init__(self, rate: float, burst: int, max_wait: float = RATE_MAX_WAIT_SECONDS):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float | None = None) -> float | None:
+        """Segundos a esperar antes de enviar, o None si hay que descartar la request."""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def acquire(self, max_wait: float | None = None) -> float:
+        """Espera turno y devuelve los segundos esperados en cola ('max_wait' acota la espera configurada)."""
+        limit = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        wait = self.reserve(limit)
+        if wait is None:
+            raise RateLimited(f"cupo agotado ({self.rate:g} req/s), espera > {limit:g} s")
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class HttpClient:
+    """
+    Cliente compartido por todo el proceso: una requests.Session por host
+    (conexiones TCP+TLS reutilizadas), cupo de requests por host y registro de
+    tiempos por request (incluida la espera en cola del cupo).
+    """
+
+    def __init__(self, pool_sizes: dict[str, int] | None = None, default_pool: int = HTTP_POOL_DEFAULT,
+                 rate_limits: dict[str, tuple[float, int]] | None = None):
+        self.pool_sizes = dict(pool_sizes or {})
+        self.default_pool = default_pool
+        self.limiters = {host: TokenBucket(rate, burst) for host, (rate, burst) in (rate_limits or {}).items() if rate > 0}
+        self.timings: deque[dict] = deque(maxlen=HTTP_TIMINGS_MAX)
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, host: str) -> requests.Session:
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                size = self.pool_sizes.get(host, self.default_pool)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                s = requests.Session()
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                self._sessions[host] = s
+            return s
+
+    def get(self, url: str, params: dict | None = None, timeout: float | tuple = 60) -> requests.Response:
+        u = urlparse(url)
+        limiter = self.limiters.get(u.netloc)
+        waited = 0.0
+        if limiter is not None:
+            try:
+                waited = limiter.acquire(deadline_remaining())
+            except RateLimited:
+                self._record(u, "shed", 0.0, 0.0)
+                raise
+        remaining = deadline_remaining()
+        if remaining is not None:
+            # El plazo en curso (descontada la espera por cupo) acota los timeouts de esta request
+            connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+            timeout = (min(connect, remaining), min(read, remaining))
+        t0 = time.perf_counter()
+        status = None
+        try:
+            r = self.session(u.netloc).get(url, params=params or {}, timeout=timeout)
+            status = r.status_code
+            return r
+        finally:
+            self._record(u, status, (time.perf_counter() - t0) * 1000.0, waited * 1000.0)
+
+    def _record(self, u, status, ms: float, wait_ms: float) -> None:
+        # status siempre como texto: 200, "error" (sin respuesta) o "shed" (descartada por el cupo)
+        metrics.inc("uvnorte_upstream_requests_total", host=u.netloc, status=str(status) if status is not None else "error")
+        if status != "shed":
+            metrics.observe("uvnorte_upstream_seconds", ms / 1000.0, host=u.netloc)
+            metrics.observe("uvnorte_ratelimit_wait_seconds", wait_ms / 1000.0, host=u.netloc)
+        self.timings.append({
+            "host": u.netloc,
+            "path": u.path,
+            "status": status,
+            "ms": ms,
+            "wait_ms": wait_ms,
+            "at": datetime.now(timezone.utc),
+        })
+
+    def recent_timings(self, host: str | None = None) -> pd.DataFrame:
+        """Tiempos de las últimas requests (opcionalmente de un solo host); wait_ms = espera por cupo."""
+        rows = [t for t in list(self.timings) if host is None or t["host"] == host]
+        return pd.DataFrame(rows, columns=["host", "path", "status", "ms", "wait_ms", "at"])
+
+    def close(self) -> None:
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+
+@functools.cache
+def http_client() -> HttpClient:
+    """Un único cliente por proceso, compartido entre sesiones y trabajos en segundo plano."""
+    return HttpClient(HTTP_POOL_SIZES, rate_limits=_rate_limits_from_env(RATE_LIMITS, os.environ.get("UV_RATE_LIMITS")))
+
+# =============================
+# RESILIENCIA: timeouts cortos, reintentos con backoff+jitter y circuit breaker por host
+# =============================
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("UV_HTTP_CONNECT_TIMEOUT_S", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("UV_HTTP_READ_TIMEOUT_S", 20))
+HTTP_RETRIES = int(os.environ.get("UV_HTTP_RETRIES", 3))
+HTTP_BACKOFF_BASE = 0.5          # segundos; el tope de espera crece 0.5, 1, 2, ... (full jitter)
+HTTP_BACKOFF_MAX = 8.0
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+BREAKER_FAILURES = int(os.environ.get("UV_BREAKER_FAILURES", 5))        # fallos seguidos para abrir
+BREAKER_RESET_SECONDS = float(os.environ.get("UV_BREAKER_RESET_S", 30))  # pausa antes de probar de nuevo
+LAST_GOOD_MAX = 256              # respuestas buenas recordadas para servir con el breaker abierto
+HTTP_MIN_ATTEMPT_SECONDS = 0.5   # con menos plazo que esto ya no se intenta otra request
+DEADLINE_MARGIN_SECONDS = 1.0    # holgura entre el plazo de las requests y el de quien espera el resultado
+
+class CircuitBreaker:
+    """
+    Breaker de un host: tras BREAKER_FAILURES fallos seguidos se abre y las requests
+    fallan al instante; pasado 'reset_seconds' deja pasar UNA de prueba (semiabierto)
+    y se cierra si responde bien.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """La request permitida no llegó al host (p. ej. descartada por el cupo): libera la prueba."""
+        with self._lock:
+            self._probing = False
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker()
+        return _breakers[host]
+
+def breaker_states() -> dict[str, str]:
+    """Estado del breaker de cada host consultado: 'closed', 'open' o 'half-open'."""
+    with _breakers_lock:
+        return {host: b.state for host, b in _breakers.items()}
+
+# Última respuesta buena de cada request (url + params): con el host caído se sirve esto
+_last_good: OrderedDict = OrderedDict()
+_last_good_lock = threading.Lock()
+
+def _remember(key, data) -> None:
+    with _last_good_lock:
+        _last_good[key] = data
+        _last_good.move_to_end(key)
+        while len(_last_good) > LAST_GOOD_MAX:
+            _last_good.popitem(last=False)
+
+def _last_good_or(key, err: str):
+    with _last_good_lock:
+        if key in _last_good:
+            return _last_good[key], None
+    return {}, err
+
+# -----------------------------
+# Plazo de la operación en curso (render, lote de indicadores): acota timeouts y reintentos
+# -----------------------------
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("uvnorte_deadline", default=None)
+
+@contextmanager
+def request_deadline(seconds: float):
+    """
+    Las requests dentro del bloque (reintentos y backoff incluidos) terminan en 'seconds'.
+    Anidado, rige el plazo más corto.
+    """
+    at = time.monotonic() + max(0.0, seconds)
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def deadline_remaining() -> float | None:
+    """Segundos que quedan del plazo en curso (None si no hay plazo)."""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+def call_with_deadline(seconds: float, fn, *args):
+    with request_deadline(seconds):
+        return fn(*args)
+
+def submit_in_context(pool, fn, *args):
+    """pool.submit que conserva el plazo en curso (los contextvars no pasan solos a otro hilo)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+def _backoff(attempt: int, retry_after: float | None = None) -> float:
+    """Espera antes del reintento 'attempt' (1, 2, ...): Retry-After si viene, si no full jitter."""
+    if retry_after is not None:
+        return min(retry_after, HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+def _retry_after(r: requests.Response) -> float | None:
+    try:
+        return float(r.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def _safe_json_get(url: str, params: dict | None = None, timeout: float | tuple | None = None):
+    """
+    GET -> .json() usando el cliente compartido, con reintentos y circuit breaker por host.
+    Devuelve (data, error). Si el host no responde (o su breaker está abierto) y esta misma
+    request ya tuvo una respuesta buena, se devuelve esa sin esperar.
+    """
+    key = ("GET", url, _normalize_key(params or {}))
+    return flights.do(key, _json_get, url, params, timeout, key)
+
+def _json_get(url: str, params: dict | None, timeout: float | tuple | None, key):
+    if HTTP_MODE == "replay":
+        return cassette().load(url, params)
+    host = urlparse(url).netloc
+    breaker = circuit_breaker(host)
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    err = f"CircuitOpen: {host} en pausa tras fallos repetidos"
+    retry_after = None
+    for attempt in range(HTTP_RETRIES + 1):
+        # Con plazo en curso, timeouts y reintentos se recortan a lo que queda de él
+        remaining = deadline_remaining()
+        if attempt:
+            wait = _backoff(attempt, retry_after)
+            if remaining is not None and remaining - wait < HTTP_MIN_ATTEMPT_SECONDS:
+                break
+            time.sleep(wait)
+            remaining = deadline_remaining()
+        if remaining is not None and remaining < HTTP_MIN_ATTEMPT_SECONDS:
+            if not attempt:
+                err = f"DeadlineExceeded: sin plazo para consultar {host}"
+            break
+        if not breaker.allow():
+            break
+        try:
+            r = http_client().get(url, params=params, timeout=timeout)
+        except RateLimited as e:
+            # Descartada por el cupo propio: no es culpa del host (no cuenta para el breaker)
+            breaker.release()
+            return _last_good_or(key, f"RateLimited: {host} {e}")
+        except requests.Timeout as e:
+            if remaining is not None and (deadline_remaining() or 0.0) < HTTP_MIN_ATTEMPT_SECONDS:
+                # Se agotó nuestro plazo, no el timeout del host: no cuenta para el breaker
+                breaker.release()
+                return _last_good_or(key, f"DeadlineExceeded: {host} sin respuesta dentro del plazo")
+            breaker.record_failure()
+            err, retry_after = f"{type(e).__name__}: {e}", None
+            continue
+        except requests.ConnectionError as e:
+            breaker.record_failure()
+            err, retry_after = f"{type(e).__name__}: {e}", None
+            continue
+        except Exception as e:
+            # Otros errores de transporte (ChunkedEncodingError, TooManyRedirects, ...): fallo del
+            # host sin reintento; también cierran una prueba en curso del breaker
+            breaker.record_failure()
+            return _last_good_or(key, f"{type(e).__name__}: {e}")
+        if r.status_code in RETRYABLE_STATUS:
+            breaker.record_failure()
+            err, retry_after = f"HTTPError: {r.status_code} {r.reason} for url: {r.url}", _retry_after(r)
+            continue
+        # El host respondió: errores 4xx o JSON inválido no se reintentan ni abren el breaker
+        breaker.record_success()
+        try:
+            r.raise_for_status()
+            with span("decode.json"):
+                data = _loads(r.content)
+        except Exception as e:
+            return {}, f"{type(e).__name__}: {e}"
+        _remember(key, data)
+        if HTTP_MODE == "record":
+            cassette().save(url, params, data)
+        return data, None
+    return _last_good_or(key, err)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Métricas del proceso: spans por etapa (fetch, decode, parseo, merge, gráficos) con
+# histogramas, contadores de upstream y de caché, exportados en formato de texto de
+# Prometheus desde un endpoint local opcional (UV_METRICS_PORT).
+
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.environ.get("UV_METRICS_PORT", 0))       # 0 = sin endpoint
+METRICS_HOST = os.environ.get("UV_METRICS_HOST", "127.0.0.1")
+DEBUG_PANEL = os.environ.get("UV_DEBUG_PANEL", "0") == "1"  # panel de métricas en la página (o ?debug=1)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 512   # últimas duraciones por serie, para p50/p95 del panel de depuración
+
+log = logging.getLogger(__name__)
+
+_HELP = {
+    "uvnorte_stage_seconds": ("histogram", "Duración de cada etapa (fetch, decode, parseo, merge, gráfico)."),
+    "uvnorte_upstream_seconds": ("histogram", "Duración de las requests HTTP al upstream, por host."),
+    "uvnorte_ratelimit_wait_seconds": ("histogram", "Espera en cola por el cupo de requests, por host."),
+    "uvnorte_upstream_requests_total": ("counter", "Requests al upstream por host y status."),
+    "uvnorte_cache_requests_total": ("counter", "Lecturas de funciones cacheadas por resultado (hit/stale/miss)."),
+    "uvnorte_circuit_open": ("gauge", "1 si el circuit breaker del host no está cerrado."),
+}
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.recent: deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        for i, le in enumerate(self.buckets):
+            if value <= le:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+class Metrics:
+    """Registro en memoria, compartido por todas las sesiones del proceso."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, tuple], _Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = _Histogram(self.buckets)
+            h.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    def stage_summary(self) -> list[dict]:
+        """Por etapa: n, total, p50 y p95 (ms, sobre las últimas muestras), ordenado por tiempo total."""
+        rows = []
+        with self._lock:
+            for (name, labels), h in self._histograms.items():
+                if name != "uvnorte_stage_seconds":
+                    continue
+                recent = sorted(h.recent)
+                rows.append({
+                    "stage": dict(labels).get("stage"),
+                    "n": h.count,
+                    "total_ms": h.sum * 1000.0,
+                    "p50_ms": recent[len(recent) // 2] * 1000.0 if recent else None,
+                    "p95_ms": recent[min(len(recent) - 1, int(0.95 * len(recent)))] * 1000.0 if recent else None,
+                })
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def stage_samples(self) -> dict[str, tuple[int, float, list[float]]]:
+        """Por etapa: (n, total s, últimas duraciones s), para combinar varios procesos."""
+        with self._lock:
+            return {dict(labels).get("stage"): (h.count, h.sum, list(h.recent))
+                    for (name, labels), h in self._histograms.items() if name == "uvnorte_stage_seconds"}
+
+    def counters(self, name: str) -> list[tuple[dict, float]]:
+        with self._lock:
+            return [(dict(labels), v) for (n, labels), v in self._counters.items() if n == name]
+
+    def render_prometheus(self) -> str:
+        """Formato de texto de exposición de Prometheus (versión 0.0.4)."""
+        from .cache import cache_counters
+        from .http import breaker_states
+
+        with self._lock:
+            histograms = {k: (list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+        for fn, outcomes in cache_counters().items():
+            for outcome, n in outcomes.items():
+                counters[("uvnorte_cache_requests_total", (("function", fn), ("outcome", outcome)))] = n
+        gauges = {("uvnorte_circuit_open", (("host", host),)): int(state != "closed")
+                  for host, state in breaker_states().items()}
+
+        lines = []
+        for name in sorted({k[0] for k in (*histograms, *counters, *gauges)}):
+            kind, help_text = _HELP.get(name, ("untyped", name))
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (n, labels), (counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for le, c in zip(self.buckets, counts):
+                    lines.append(f"{name}_bucket{_labels(labels, le=f'{le:g}')} {c}")
+                lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+            for (n, labels), v in sorted({**counters, **gauges}.items()):
+                if n == name:
+                    lines.append(f"{name}{_labels(labels)} {v:g}")
+        return "\n".join(lines) + "\n"
+
+def _labels(labels: tuple, **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+metrics = Metrics()
+
+# -----------------------------
+# Spans
+# -----------------------------
+@contextmanager
+def span(stage: str):
+    """Mide el bloque y lo suma al histograma de la etapa (también si levanta excepción)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("uvnorte_stage_seconds", time.perf_counter() - t0, stage=stage)
+
+def timed(stage: str):
+    """Decorador: cada llamada a la función es un span de 'stage'."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+# -----------------------------
+# Endpoint /metrics
+# -----------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@functools.cache
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer | None:
+    """
+    Inicia (una vez por proceso) el endpoint de métricas en un hilo de fondo. None si port=0
+    o si el puerto está ocupado (p. ej. otra réplica en el mismo host con el mismo entorno):
+    las métricas son opcionales y nunca deben botar la página.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        log.warning("Endpoint de métricas desactivado: no se pudo abrir %s:%s (%s)", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="uv-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Indicadores de mindicador.cl: cobre (USD/libra) y dólar observado, con histórico multi-año.
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .cache import CACHE_MAX_ENTRIES, MINDICADOR_TTL, cached
+from .config import MINDICADOR_BASE, today
+from .frames import _mindicador_serie_to_df
+from .http import DEADLINE_MARGIN_SECONDS, _safe_json_get, call_with_deadline, deadline_remaining, submit_in_context
+from .metrics import timed
+from .store import mindicador_store
+
+MINDICADOR_DEADLINE_SECONDS = 40  # plazo total para un lote de indicadores (dentro del plazo del render)
+COBRE_MAX_DIAS = 180              # máximo del slider "Rango histórico cobre"
+
+@cached(ttl=MINDICADOR_TTL, max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: r[1] is not None)
+def fetch_mindicador_series(indicador: str) -> tuple[pd.DataFrame, str | None]:
+    """
+    Obtiene la serie reciente de un indicador desde mindicador.cl
+    Devuelve DataFrame con columnas: date, value; y posible error.
+    """
+    return _fetch_mindicador_url(f"{MINDICADOR_BASE}/{indicador}", indicador)
+
+@timed("fetch.mindicador")
+def _fetch_mindicador_url(url: str, indicador: str) -> tuple[pd.DataFrame, str | None]:
+    data, err = _safe_json_get(url)
+    if err:
+        return pd.DataFrame(), f"Error {indicador}: {err}"
+    serie = data.get("serie", [])
+    if not isinstance(serie, list) or not serie:
+        return pd.DataFrame(), f"Sin serie para {indicador}"
+    return _mindicador_serie_to_df(serie), None
+
+# -----------------------------
+# Histórico multi-año: /api/{indicador}/{año} + almacén local con top-up
+# -----------------------------
+MINDICADOR_RECENT_DAYS = 25   # /api/{indicador} cubre ~1 mes; más atrás hay que pedir el año
+MINDICADOR_MAX_WORKERS = 4
+
+@cached(ttl=MINDICADOR_TTL, max_entries=CACHE_MAX_ENTRIES, is_error=lambda r: r[1] is not None)
+def fetch_mindicador_history(indicador: str, desde: date) -> tuple[pd.DataFrame, str | None]:
+    """
+    Serie de 'indicador' desde 'desde' hasta hoy (columnas: date, value).
+    Los años que faltan en el almacén local se piden en paralelo a /api/{indicador}/{año};
+    después basta un top-up con /api/{indicador} (último mes) por refresco.
+    """
+    hoy = today()
+    store = mindicador_store()
+    closed = store.closed_years(indicador)
+    # Primera observación guardada ANTES de este lote: un año vacío anterior a ella es de
+    # antes de que existiera el indicador (las del lote no sirven: pueden ser del año siguiente)
+    first = store.first_date(indicador)
+    last = store.last_date(indicador)
+    years = [y for y in range(desde.year, hoy.year + 1) if y not in closed]
+    # Año en curso: basta el endpoint reciente si lo guardado llega a menos de un mes atrás
+    recent_ok = last is not None and last.year == hoy.year and (hoy - last).days <= MINDICADOR_RECENT_DAYS
+    if recent_ok:
+        years = [y for y in years if y != hoy.year]
+
+    errors = []
+    jobs = [(f"{MINDICADOR_BASE}/{indicador}/{y}", y) for y in years]
+    if recent_ok:
+        jobs.append((f"{MINDICADOR_BASE}/{indicador}", None))
+    with ThreadPoolExecutor(max_workers=max(1, min(MINDICADOR_MAX_WORKERS, len(jobs)))) as pool:
+        futures = [submit_in_context(pool, _fetch_mindicador_url, url, indicador) for url, _ in jobs]
+        results = [f.result() for f in futures]
+    for (_, year), (df, err) in zip(jobs, results):
+        if err and not err.startswith("Sin serie"):
+            errors.append(err if year is None else f"{err} ({year})")
+            continue
+        # Año pasado: se cierra si trajo observaciones o si es anterior a la primera guardada;
+        # cualquier otro "Sin serie" pudo ser transitorio y se vuelve a pedir
+        past = year is not None and year < hoy.year
+        settled = past and (not df.empty or (first is not None and year < first.year))
+        store.save(indicador, df, closed_year=year if settled else None)
+
+    df = store.load(indicador, desde, hoy)
+    if df.empty:
+        return df, "; ".join(errors) or f"Sin serie para {indicador}"
+    return df, ("; ".join(errors) or None)
+
+def fetch_mindicador_many(indicadores: tuple[str, ...],
+                          deadline: float = MINDICADOR_DEADLINE_SECONDS,
+                          desde: date | None = None) -> dict[str, tuple[pd.DataFrame, str | None]]:
+    """
+    Obtiene varios indicadores en paralelo bajo un único plazo total.
+    Con 'desde' usa el histórico multi-año (fetch_mindicador_history); sin él, la serie reciente.
+    Devuelve {indicador: (df, error)}; los que no alcanzan a responder quedan con su error
+    y no bloquean al resto (latencia = la request más lenta, no la suma). Dentro de otro
+    plazo (p. ej. el del render) rige el más corto; timeouts y reintentos se ajustan a él.
+    """
+    if not indicadores:
+        return {}
+    remaining = deadline_remaining()
+    deadline = deadline if remaining is None else min(deadline, remaining)
+    budget = max(0.0, deadline - DEADLINE_MARGIN_SECONDS)
+    pool = ThreadPoolExecutor(max_workers=len(indicadores))
+    if desde is None:
+        futures = {ind: submit_in_context(pool, call_with_deadline, budget, fetch_mindicador_series, ind)
+                   for ind in indicadores}
+    else:
+        futures = {ind: submit_in_context(pool, call_with_deadline, budget, fetch_mindicador_history, ind, desde)
+                   for ind in indicadores}
+    done, _ = wait(futures.values(), timeout=deadline)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    out = {}
+    for ind, fut in futures.items():
+        if fut not in done:
+            out[ind] = (pd.DataFrame(), f"Error {ind}: sin respuesta en {deadline:.0f} s")
+            continue
+        try:
+            out[ind] = fut.result()
+        except Exception as e:
+            out[ind] = (pd.DataFrame(), f"Error {ind}: {type(e).__name__}: {e}")
+    return out
+
+@timed("fetch.cobre")
+def fetch_cobre_usd_and_usdclp(dias: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Trae (últimos 'dias' días, por defecto COBRE_MAX_DIAS):
+      - Serie de 'libra_cobre' (USD/libra)
+      - Serie de 'dolar' (CLP/USD)
+    Retorna (df_cobre, df_usd, meta); meta['stale'] si es el valor anterior mientras se refresca.
+    """
+    (cobre_df, usd_df, meta), stale = _fetch_cobre_cached.lookup(dias)
+    return cobre_df, usd_df, ({**meta, "stale": True} if stale else meta)
+
+def refresh_cobre(dias: int | None = None) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Precarga: vuelve a pedir el histórico de cobre y dólar y recalcula la entrada que lee
+    fetch_cobre_usd_and_usdclp, aunque ambas sigan vigentes.
+    """
+    desde = today() - timedelta(days=int(dias or COBRE_MAX_DIAS))
+    for ind in ("libra_cobre", "dolar"):
+        fetch_mindicador_history.refresh(ind, desde)
+    return _fetch_cobre_cached.refresh(dias)
+
+@cached(ttl=MINDICADOR_TTL, max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: bool(r[2].get("error")))
+def _fetch_cobre_cached(dias: int | None) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    desde = today() - timedelta(days=int(dias or COBRE_MAX_DIAS))
+    series = fetch_mindicador_many(("libra_cobre", "dolar"), desde=desde)
+    cobre_df, err1 = series["libra_cobre"]
+    usd_df, err2 = series["dolar"]
+    meta = {"error": None}
+    if err1 or err2:
+        meta["error"] = "; ".join([e for e in [err1, err2] if e])
+    return cobre_clp_asof(cobre_df, usd_df), usd_df, meta
+
+@timed("merge.cobre_asof")
+def cobre_clp_asof(cobre_df: pd.DataFrame, usd_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega a la serie de cobre las columnas 'usdclp' (dólar vigente a cada fecha: último
+    valor conocido, as-of hacia atrás) y 'clp_lb' = value * usdclp. Vectorizado sobre toda la serie.
+    """
+    if cobre_df.empty:
+        return cobre_df
+    if usd_df.empty:
+        return cobre_df.assign(usdclp=np.nan, clp_lb=np.nan)
+    out = pd.merge_asof(
+        cobre_df.sort_values("date"),
+        usd_df[["date", "value"]].rename(columns={"value": "usdclp"}).sort_values("date"),
+        on="date",
+        direction="backward",
+    )
+    out["clp_lb"] = out["value"] * out["usdclp"]
+    return out
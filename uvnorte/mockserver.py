@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# Servidor local que imita Open-Meteo (archive/forecast) y mindicador.cl, con latencia y
+# errores configurables, para medir y hacer pruebas de carga sin red:
+#
+#   python -m uvnorte.mockserver --port 8765 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+#   UV_API_BASE=http://127.0.0.1:8765 streamlit run proyecto-uv.py
+#
+# Sirve lo grabado en un cassette (uvnorte.replay) si existe; si no, datos sintéticos
+# deterministas con la misma forma que las respuestas reales.
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+from .config import ARCHIVE_LAG_DAYS, today as current_day
+from .replay import Cassette
+
+# -----------------------------
+# Generadores sintéticos (misma forma que las APIs reales)
+# -----------------------------
+MINDICADOR_BASE_VALUES = {"libra_cobre": 4.5, "dolar": 930.0, "euro": 1010.0, "uf": 39000.0}
+
+def _uv_day(lat: float, d: date) -> float:
+    return round(8 + 4 * math.sin(d.toordinal() / 58.0) + abs(lat) / 10, 2)
+
+def _uv_hour(lat: float, t: datetime) -> float:
+    return max(0.0, round((9 + abs(lat) / 10) * math.sin((t.hour - 6) / 12 * math.pi), 2))
+
+MOCK_TIMEZONE = "America/Santiago"
+
+def _location(lat: float, lon: float) -> dict:
+    return {"latitude": lat, "longitude": lon, "timezone": MOCK_TIMEZONE, "utc_offset_seconds": -10800}
+
+def _unixtime(t: datetime) -> int:
+    # Hora local de la ubicación -> segundos UTC, como timeformat=unixtime de Open-Meteo
+    return int(t.replace(tzinfo=ZoneInfo(MOCK_TIMEZONE)).timestamp())
+
+def daily_payload(lat: float, lon: float, start: date, end: date, timeformat: str = "iso8601") -> dict:
+    """Respuesta daily=uv_index_max de una ubicación para [start, end]."""
+    days = [start + timedelta(days=i) for i in range(max(0, (end - start).days + 1))]
+    if timeformat == "unixtime":
+        times = [_unixtime(datetime(d.year, d.month, d.day)) for d in days]
+    else:
+        times = [d.isoformat() for d in days]
+    return {
+        **_location(lat, lon),
+        "daily_units": {"time": timeformat, "uv_index_max": ""},
+        "daily": {"time": times, "uv_index_max": [_uv_day(lat, d) for d in days]},
+    }
+
+def hourly_payload(lat: float, lon: float, start: date, days: int, timeformat: str = "iso8601") -> dict:
+    """Respuesta hourly=uv_index de una ubicación: 24*days horas desde 'start'."""
+    t0 = datetime(start.year, start.month, start.day)
+    hours = [t0 + timedelta(hours=i) for i in range(24 * days)]
+    if timeformat == "unixtime":
+        times = [_unixtime(h) for h in hours]
+    else:
+        times = [h.strftime("%Y-%m-%dT%H:%M") for h in hours]
+    return {
+        **_location(lat, lon),
+        "hourly_units": {"time": timeformat, "uv_index": ""},
+        "hourly": {"time": times, "uv_index": [_uv_hour(lat, h) for h in hours]},
+    }
+
+def _multi(items: list[dict]):
+    # Open-Meteo: con una coordenada devuelve un objeto, con varias una lista
+    return items if len(items) > 1 else items[0]
+
+def archive_payload(lats: list[float], lons: list[float], start: date, end: date,
+                    lag_days: int = ARCHIVE_LAG_DAYS, today: date | None = None, timeformat: str = "iso8601"):
+    """Archive: datos sólo hasta hoy - lag_days (como el reanálisis real)."""
+    last = min(end, (today or current_day()) - timedelta(days=lag_days))
+    return _multi([daily_payload(lat, lon, start, last, timeformat) for lat, lon in zip(lats, lons)])
+
+def forecast_payload(lats: list[float], lons: list[float], params: dict, today: date | None = None):
+    """Forecast daily (past_days/forecast_days) u hourly según los parámetros."""
+    today = today or current_day()
+    past = int(params.get("past_days", 0))
+    days = int(params.get("forecast_days", 7))
+    timeformat = params.get("timeformat", "iso8601")
+    if "hourly" in params:
+        return _multi([hourly_payload(lat, lon, today - timedelta(days=past), past + days, timeformat)
+                       for lat, lon in zip(lats, lons)])
+    return _multi([daily_payload(lat, lon, today - timedelta(days=past), today + timedelta(days=days - 1), timeformat)
+                   for lat, lon in zip(lats, lons)])
+
+def mindicador_payload(indicador: str, start: date, end: date) -> dict:
+    """Serie diaria hábil, más reciente primero, con 'fecha' en UTC como la API real."""
+    base = MINDICADOR_BASE_VALUES.get(indicador, 100.0)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    serie = [
+        {"fecha": f"{d.isoformat()}T03:00:00.000Z", "valor": round(base * (1 + 0.03 * math.sin(d.toordinal() / 9.0)), 4)}
+        for d in reversed(days) if d.weekday() < 5
+    ]
+    return {"version": "mock", "autor": "uvnorte", "codigo": indicador, "nombre": indicador,
+            "unidad_medida": "", "serie": serie}
+
+# -----------------------------
+# Servidor
+# -----------------------------
+class MockAPI:
+    """Estado y opciones del servidor local (compartido por todos los hilos del servidor)."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, lag_days: int = ARCHIVE_LAG_DAYS,
+                 cassette: Path | None = None, seed: int | None = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lag_days = lag_days
+        self.cassette = Cassette(cassette) if cassette else None
+        self.counts: Counter = Counter()   # (ruta, status) -> requests atendidas
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self) -> tuple[float, bool]:
+        with self._lock:
+            delay = (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000.0
+            fail = self._rng.random() < self.error_rate
+        return delay, fail
+
+    def handle(self, path: str, params: dict) -> tuple[int, object]:
+        delay, fail = self._roll()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.error_status, {"error": True, "reason": "error inyectado por uvnorte.mockserver"}
+        if self.cassette is not None:
+            body = self.cassette.load_path(path, params)
+            if body is not None:
+                return 200, body
+        return self.synthetic(path, params)
+
+    def synthetic(self, path: str, params: dict) -> tuple[int, object]:
+        parts = [p for p in path.split("/") if p]
+        try:
+            if path.endswith("/archive") or path.endswith("/forecast"):
+                lats = [float(x) for x in params["latitude"].split(",")]
+                lons = [float(x) for x in params["longitude"].split(",")]
+                if len(lats) != len(lons):
+                    return 400, {"error": True, "reason": "latitude y longitude de distinto largo"}
+                if path.endswith("/archive"):
+                    start = date.fromisoformat(params["start_date"])
+                    end = date.fromisoformat(params["end_date"])
+                    return 200, archive_payload(lats, lons, start, end, self.lag_days,
+                                                timeformat=params.get("timeformat", "iso8601"))
+                return 200, forecast_payload(lats, lons, params)
+            if len(parts) >= 2 and parts[0] == "api":
+                today = current_day()
+                if len(parts) == 3:
+                    year = int(parts[2])
+                    return 200, mindicador_payload(parts[1], date(year, 1, 1), min(date(year, 12, 31), today))
+                return 200, mindicador_payload(parts[1], today - timedelta(days=30), today)
+        except (KeyError, ValueError) as e:
+            return 400, {"error": True, "reason": f"{type(e).__name__}: {e}"}
+        return 404, {"error": True, "reason": f"ruta desconocida: {path}"}
+
+def _handler_for(api: MockAPI):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, como las APIs reales
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(u.query).items()}
+            status, body = api.handle(u.path, params)
+            with api._lock:
+                api.counts[(u.path, status)] += 1
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, format, *args):
+            pass  # sin log por request: el servidor se usa para medir
+
+    return Handler
+
+def serve(host: str = "127.0.0.1", port: int = 0, **options) -> ThreadingHTTPServer:
+    """
+    Inicia el servidor en un hilo de fondo y lo devuelve (server.url, server.api).
+    port=0 elige un puerto libre. server.shutdown() lo detiene.
+    """
+    api = MockAPI(**options)
+    server = ThreadingHTTPServer((host, port), _handler_for(api))
+    server.daemon_threads = True
+    server.api = api
+    server.url = f"http://{host}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, name="uv-mockserver", daemon=True).start()
+    return server
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Servidor local de Open-Meteo y mindicador.cl (datos sintéticos o grabados).")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="latencia fija por request")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="latencia extra aleatoria (uniforme 0..jitter)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fracción de requests que fallan (0..1)")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--lag-days", type=int, default=ARCHIVE_LAG_DAYS, help="rezago del archive respecto de hoy")
+    ap.add_argument("--cassette", type=Path, default=None, help="directorio grabado con UV_HTTP_MODE=record")
+    ap.add_argument("--seed", type=int, default=None)
+    a = ap.parse_args(argv)
+    server = serve(a.host, a.port, latency_ms=a.latency_ms, jitter_ms=a.jitter_ms, error_rate=a.error_rate,
+                   error_status=a.error_status, lag_days=a.lag_days, cassette=a.cassette, seed=a.seed)
+    print(f"uvnorte.mockserver en {server.url}  (UV_API_BASE={server.url})", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# Precarga periódica en segundo plano de las mismas cachés que lee la UI.
+
+import functools
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from .cache import FORECAST_UPDATE_HOURS, MINDICADOR_TTL, next_forecast_run
+from .config import CIUDADES, UV_WINDOW_DAYS, today
+from .mindicador import refresh_cobre
+from .uv import refresh_uv_daily_multi, refresh_uv_forecast_hourly_multi
+
+PREFETCH_ENABLED = os.environ.get("UV_PREFETCH", "0") == "1"
+# Por defecto, la vigencia de cada caché: histórico y pronóstico cambian de llave con cada
+# corrida (forecast_run_key); cobre vence por TTL y se refresca un poco antes de que venza.
+PREFETCH_INTERVALS_MIN = {
+    "histórico": float(os.environ.get("UV_PREFETCH_HISTORY_MIN", FORECAST_UPDATE_HOURS * 60)),
+    "pronóstico": float(os.environ.get("UV_PREFETCH_FORECAST_MIN", FORECAST_UPDATE_HOURS * 60)),
+    "cobre": float(os.environ.get("UV_PREFETCH_MINDICADOR_MIN", 0.9 * MINDICADOR_TTL.total_seconds() / 60)),
+}
+PREFETCH_RUN_ALIGNED = ("histórico", "pronóstico")  # se lanzan apenas cambia forecast_run_key()
+PREFETCH_RUN_DELAY_SECONDS = 5                      # holgura tras el cambio de corrida
+PREFETCH_TICK_SECONDS = 30
+
+class PrefetchScheduler:
+    """
+    Hilo de fondo que refresca periódicamente las mismas cachés que lee la UI,
+    para que los renders interactivos sean siempre hits.
+    tasks: nombre -> (intervalo en minutos, función sin argumentos)
+    run_aligned: tareas que además corren al comenzar cada corrida de pronóstico
+    """
+
+    def __init__(self, tasks: dict, run_aligned: tuple[str, ...] = ()):
+        self.tasks = tasks
+        self.run_aligned = run_aligned
+        self.last_refresh: dict[str, datetime] = {}
+        self.last_error: dict[str, str | None] = {}
+        self._next_run = {name: 0.0 for name in tasks}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="uv-prefetch", daemon=True)
+
+    def start(self) -> "PrefetchScheduler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_task(self, name: str) -> None:
+        interval_min, fn = self.tasks[name]
+        try:
+            fn()
+            self.last_refresh[name] = datetime.now(timezone.utc)
+            self.last_error[name] = None
+        except Exception as e:
+            self.last_error[name] = f"{type(e).__name__}: {e}"
+        self._next_run[name] = time.monotonic() + interval_min * 60
+        if name in self.run_aligned:
+            now = datetime.now(timezone.utc)
+            to_next_run = (next_forecast_run(now) - now).total_seconds() + PREFETCH_RUN_DELAY_SECONDS
+            self._next_run[name] = min(self._next_run[name], time.monotonic() + to_next_run)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for name in self.tasks:
+                if time.monotonic() >= self._next_run[name]:
+                    self.run_task(name)
+            self._stop.wait(PREFETCH_TICK_SECONDS)
+
+# Las tareas recalculan aunque la entrada siga vigente: leer la caché sería un hit sin efecto
+def _prefetch_history():
+    fin = today() - timedelta(days=1)
+    refresh_uv_daily_multi(CIUDADES, fin - timedelta(days=UV_WINDOW_DAYS), fin)
+
+def _prefetch_forecast():
+    refresh_uv_forecast_hourly_multi(CIUDADES)
+
+def _prefetch_cobre():
+    refresh_cobre()
+
+@functools.cache
+def prefetch_scheduler() -> PrefetchScheduler:
+    """Un único scheduler por proceso (se inicia en la primera llamada)."""
+    tasks = {
+        "histórico": (PREFETCH_INTERVALS_MIN["histórico"], _prefetch_history),
+        "pronóstico": (PREFETCH_INTERVALS_MIN["pronóstico"], _prefetch_forecast),
+        "cobre": (PREFETCH_INTERVALS_MIN["cobre"], _prefetch_cobre),
+    }
+    return PrefetchScheduler(tasks, run_aligned=PREFETCH_RUN_ALIGNED).start()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Grabación y reproducción de respuestas JSON (UV_HTTP_MODE=record|replay) para medir sin red.
+
+import functools
+import hashlib
+import json
+from pathlib import Path
+from urllib.parse import urlparse
+
+from .cache import _normalize_key
+from .config import CASSETTE_DIR, CASSETTE_RECORDED_ON, today
+
+class Cassette:
+    """
+    Respuestas grabadas, un archivo JSON por request. La llave usa sólo la ruta y los
+    parámetros (no el host), así lo grabado contra la API real también lo puede servir
+    el servidor local (uvnorte.mockserver) con los mismos endpoints.
+    Los parámetros con fechas relativas a hoy (past_days, end_date) sólo coinciden si "hoy"
+    es el día de la grabación: se guarda en CASSETTE_RECORDED_ON y replay lo usa (config.today).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @staticmethod
+    def request_key(path: str, params: dict | None) -> str:
+        norm = _normalize_key({k: str(v) for k, v in (params or {}).items()})
+        return hashlib.sha1(f"{path}?{norm!r}".encode("utf-8")).hexdigest()
+
+    def _file(self, url: str, params: dict | None) -> Path:
+        path = urlparse(url).path
+        return self.path / f"{self.request_key(path, params)}.json"
+
+    def save(self, url: str, params: dict | None, data) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        record = {"path": urlparse(url).path, "params": {k: str(v) for k, v in (params or {}).items()}, "body": data}
+        tmp = self._file(url, params).with_suffix(".tmp")
+        tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self._file(url, params))
+        recorded_on = self.path / CASSETTE_RECORDED_ON
+        day = today().isoformat()
+        if not recorded_on.exists() or recorded_on.read_text(encoding="utf-8").strip() != day:
+            recorded_on.write_text(day, encoding="utf-8")
+
+    def load(self, url: str, params: dict | None):
+        """(data, error) como _safe_json_get; error si la request no fue grabada."""
+        f = self._file(url, params)
+        if not f.exists():
+            return {}, f"ReplayMiss: {urlparse(url).path} no está grabada en {self.path} (hoy = {today()})"
+        return json.loads(f.read_text(encoding="utf-8"))["body"], None
+
+    def load_path(self, path: str, params: dict | None):
+        """Cuerpo grabado para una ruta + parámetros (lo usa el servidor local), o None."""
+        f = self.path / f"{self.request_key(path, params)}.json"
+        if not f.exists():
+            return None
+        return json.loads(f.read_text(encoding="utf-8"))["body"]
+
+@functools.cache
+def cassette() -> Cassette:
+    return Cassette(CASSETTE_DIR)
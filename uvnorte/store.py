@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Almacenes locales en SQLite (sobreviven reinicios): histórico UVI y series de mindicador.cl.
+
+import functools
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from .config import ARCHIVE_LAG_DAYS, DATA_DIR, DATE_DTYPE, UV_DTYPE, today
+
+# -----------------------------
+# ALMACÉN LOCAL DEL HISTÓRICO UVI (SQLite, sobrevive reinicios)
+# -----------------------------
+GAP_MERGE_DAYS = 7        # huecos separados por menos de esto se piden en una sola request
+
+class UVHistoryStore:
+    """
+    Días UVI ya descargados, por ubicación (lat,lon redondeadas).
+    final=1: valor de archive (inmutable) o día confirmado sin dato; final=0: valor
+    provisorio de forecast(past_days), que se vuelve a pedir cuando archive ya debería tenerlo.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS uv_daily ("
+                " loc TEXT NOT NULL, date TEXT NOT NULL, uv_index_max REAL, final INTEGER NOT NULL,"
+                " PRIMARY KEY (loc, date))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def loc_key(lat: float, lon: float) -> str:
+        return f"{lat:.4f},{lon:.4f}"
+
+    def load(self, loc: str, start: date, end: date) -> pd.DataFrame:
+        """Filas guardadas en [start, end] -> DataFrame [date, uv_index_max, final] ordenado."""
+        with self._connect() as con:
+            df = pd.read_sql_query(
+                "SELECT date, uv_index_max, final FROM uv_daily WHERE loc = ? AND date BETWEEN ? AND ? ORDER BY date",
+                con, params=(loc, start.isoformat(), end.isoformat()),
+            )
+        df["date"] = pd.to_datetime(df["date"]).astype(DATE_DTYPE)
+        df["uv_index_max"] = pd.to_numeric(df["uv_index_max"], errors="coerce").astype(UV_DTYPE)
+        return df
+
+    def missing_ranges(self, loc: str, start: date, end: date) -> list[tuple[date, date]]:
+        """Tramos [desde, hasta] que faltan (o siguen provisorios pasado el rezago de archive)."""
+        if start > end:
+            return []
+        have = self.load(loc, start, end)
+        settled_until = pd.Timestamp(today() - timedelta(days=ARCHIVE_LAG_DAYS))
+        ok = have.loc[(have["final"] == 1) | (have["date"] > settled_until), "date"]
+        days = pd.date_range(start, end, freq="D")
+        todo = days[~days.isin(ok)]
+        ranges: list[tuple[date, date]] = []
+        for d in todo.date:
+            if ranges and (d - ranges[-1][1]).days <= GAP_MERGE_DAYS:
+                ranges[-1] = (ranges[-1][0], d)
+            else:
+                ranges.append((d, d))
+        return ranges
+
+    def save(self, loc: str, df: pd.DataFrame, start: date, end: date,
+             archive_until: date | None, complete: bool) -> None:
+        """
+        Guarda lo descargado para [start, end]. Si la descarga fue completa, los días
+        asentados (fuera del rezago de archive) sin valor se guardan como NULL final
+        para no volver a pedirlos.
+        """
+        rows = {}
+        if complete:
+            settled_until = min(end, today() - timedelta(days=ARCHIVE_LAG_DAYS))
+            for d in pd.date_range(start, settled_until, freq="D").date:
+                rows[d] = (None, 1)
+        if not df.empty:
+            for d, v in zip(df["date"].dt.date, df["uv_index_max"]):
+                rows[d] = (float(v), int(archive_until is not None and d <= archive_until))
+        if not rows:
+            return
+        with self._connect() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO uv_daily (loc, date, uv_index_max, final) VALUES (?, ?, ?, ?)",
+                [(loc, d.isoformat(), v, f) for d, (v, f) in rows.items()],
+            )
+
+@functools.cache
+def uv_store() -> UVHistoryStore:
+    return UVHistoryStore(DATA_DIR / "uv_daily.sqlite")
+
+# -----------------------------
+# ALMACÉN LOCAL DE MINDICADOR (años cerrados + top-up reciente)
+# -----------------------------
+class MindicadorStore:
+    """Observaciones de mindicador.cl ya descargadas, por indicador; años cerrados no se vuelven a pedir."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS serie ("
+                " indicador TEXT NOT NULL, date TEXT NOT NULL, value REAL NOT NULL,"
+                " PRIMARY KEY (indicador, date))"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS years ("
+                " indicador TEXT NOT NULL, year INTEGER NOT NULL, PRIMARY KEY (indicador, year))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, indicador: str, start: date, end: date) -> pd.DataFrame:
+        with self._connect() as con:
+            df = pd.read_sql_query(
+                "SELECT date, value FROM serie WHERE indicador = ? AND date BETWEEN ? AND ? ORDER BY date",
+                con, params=(indicador, start.isoformat(), end.isoformat()),
+            )
+        df["date"] = pd.to_datetime(df["date"]).astype(DATE_DTYPE)
+        return df
+
+    def first_date(self, indicador: str) -> date | None:
+        with self._connect() as con:
+            row = con.execute("SELECT MIN(date) FROM serie WHERE indicador = ?", (indicador,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def last_date(self, indicador: str) -> date | None:
+        with self._connect() as con:
+            row = con.execute("SELECT MAX(date) FROM serie WHERE indicador = ?", (indicador,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def closed_years(self, indicador: str) -> set[int]:
+        with self._connect() as con:
+            rows = con.execute("SELECT year FROM years WHERE indicador = ?", (indicador,)).fetchall()
+        return {r[0] for r in rows}
+
+    def save(self, indicador: str, df: pd.DataFrame, closed_year: int | None = None) -> None:
+        # mindicador informa la fecha del día con hora UTC; se guarda sólo el día
+        rows = [(indicador, d.isoformat(), float(v)) for d, v in zip(df["date"].dt.date, df["value"])] if not df.empty else []
+        with self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO serie (indicador, date, value) VALUES (?, ?, ?)", rows)
+            if closed_year is not None:
+                con.execute("INSERT OR REPLACE INTO years (indicador, year) VALUES (?, ?)", (indicador, closed_year))
+
+@functools.cache
+def mindicador_store() -> MindicadorStore:
+    return MindicadorStore(DATA_DIR / "mindicador.sqlite")
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+# Histórico diario (archive + forecast past_days) y pronóstico horario UVI desde Open-Meteo.
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .cache import CACHE_MAX_ENTRIES, FORECAST_TTL, cache_run_key, cached, forecast_run_key
+from .config import (ARCHIVE_LAG_DAYS, NORTE_GRANDE_CITIES, OPEN_METEO_ARCHIVE, OPEN_METEO_FORECAST,
+                     OPEN_METEO_TIMEFORMAT, UV_STORE_ENABLED, today)
+from .frames import _hourly_json_to_df, _uv_json_to_df, last_date, slice_sorted
+from .http import _safe_json_get, submit_in_context
+from .metrics import timed
+from .store import UVHistoryStore, uv_store
+
+# -----------------------------
+# Consultas multi-ubicación (Open-Meteo acepta listas lat/lon separadas por coma)
+# -----------------------------
+PAST_DAYS_MAX = 92
+SPECULATIVE_FORECAST = True      # pedir archive y forecast a la vez si 'end' cae en el rezago
+SPECULATIVE_MARGIN_DAYS = 3      # holgura extra de past_days en la request especulativa
+
+def _coords_params(coords: tuple[tuple[float, float], ...]) -> dict:
+    return {
+        "latitude": ",".join(str(lat) for lat, _ in coords),
+        "longitude": ",".join(str(lon) for _, lon in coords),
+    }
+
+def _split_locations(d, n: int) -> list[dict]:
+    """Con varias coordenadas la respuesta es una lista (una entrada por ubicación, mismo orden)."""
+    items = d if isinstance(d, list) else [d]
+    if len(items) != n:
+        return [{} for _ in range(n)]
+    return items
+
+# Descarga por tramos del archive (rangos largos: varios años)
+ARCHIVE_CHUNK_FREQ = "YS"        # "YS" = por año calendario, "MS" = por mes
+ARCHIVE_CHUNK_MIN_DAYS = 366     # bajo este largo se pide el rango completo de una vez
+ARCHIVE_MAX_WORKERS = 4
+
+def _date_chunks(start: date, end: date, freq: str = ARCHIVE_CHUNK_FREQ) -> list[tuple[date, date]]:
+    """Parte [start, end] en ventanas consecutivas alineadas a 'freq' (año o mes calendario)."""
+    if (end - start).days + 1 <= ARCHIVE_CHUNK_MIN_DAYS:
+        return [(start, end)]
+    starts = [start] + [d for d in pd.date_range(start, end, freq=freq).date if d > start]
+    ends = [s - timedelta(days=1) for s in starts[1:]] + [end]
+    return list(zip(starts, ends))
+
+def _fetch_archive_chunk(coords: tuple[tuple[float, float], ...], start: date, end: date):
+    """Un tramo del archive para todas las ubicaciones (los reintentos los hace _safe_json_get)."""
+    p_arch = {
+        **_coords_params(coords),
+        "start_date": start.strftime("%Y-%m-%d"),
+        "end_date": end.strftime("%Y-%m-%d"),
+        "daily": "uv_index_max",
+        "timezone": "auto",
+        "timeformat": OPEN_METEO_TIMEFORMAT,
+    }
+    data, err = _safe_json_get(OPEN_METEO_ARCHIVE, p_arch)
+    if err:
+        return [pd.DataFrame() for _ in coords], err
+    return [_uv_json_to_df(d) for d in _split_locations(data, len(coords))], None
+
+@timed("fetch.archive")
+def _fetch_archive_chunked(coords: tuple[tuple[float, float], ...], start: date, end: date):
+    """
+    Descarga [start, end] del archive en tramos concurrentes (pool acotado) y los une en orden.
+    Devuelve (lista de df por ubicación, error de los tramos fallidos o None).
+    """
+    chunks = _date_chunks(start, end)
+    if len(chunks) == 1:
+        results = [_fetch_archive_chunk(coords, start, end)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(ARCHIVE_MAX_WORKERS, len(chunks))) as pool:
+            futures = [submit_in_context(pool, _fetch_archive_chunk, coords, *c) for c in chunks]
+            results = [f.result() for f in futures]
+
+    failed = [f"{a}→{b}: {err}" for (a, b), (_, err) in zip(chunks, results) if err]
+    dfs = []
+    for i in range(len(coords)):
+        parts = [dfs_chunk[i] for dfs_chunk, _ in results if not dfs_chunk[i].empty]
+        if not parts:
+            dfs.append(pd.DataFrame())
+            continue
+        df = pd.concat(parts, ignore_index=True)
+        dfs.append(df.drop_duplicates(subset=["date"]).sort_values("date").reset_index(drop=True))
+    return dfs, ("; ".join(failed) if failed else None)
+
+def _past_days_from(needed_from: date) -> int:
+    """past_days se cuenta hacia atrás desde HOY, con tope de 92."""
+    return max(1, min(PAST_DAYS_MAX, (today() - needed_from).days))
+
+@timed("merge.archive_forecast")
+def _merge_archive_forecast(df_arch: pd.DataFrame, df_fc: pd.DataFrame, err_fc: str | None,
+                            start: date, end_eff: date, past_days: int):
+    """Gap-fill de UNA ubicación: archive + forecast(past_days) sólo en el tramo faltante."""
+    if df_arch.empty:
+        if err_fc:
+            return pd.DataFrame(), f"Error consultando forecast: {err_fc}", {"source": "none"}
+        if df_fc.empty:
+            return pd.DataFrame(), "Sin datos de UVI para el rango/ubicación.", {"source": "empty"}
+        return slice_sorted(df_fc, start, end_eff).reset_index(drop=True), None, {"source": f"forecast(past_days={past_days})"}
+
+    last_arch_date = last_date(df_arch)
+    df_arch_rng = slice_sorted(df_arch, start, end_eff).reset_index(drop=True)
+    meta_arch = {"source": "archive", "archive_until": last_arch_date}
+    # Si archive cubre hasta end_eff, no hace falta forecast
+    if last_arch_date >= end_eff:
+        return df_arch_rng, None, meta_arch
+    if err_fc:
+        # Si forecast falló, al menos devuelve lo que hubo en archive
+        return df_arch_rng, f"Forecast fallback falló: {err_fc}", meta_arch
+    if df_fc.empty:
+        return df_arch_rng, None, meta_arch
+
+    # Fusionar: archive + forecast (sólo tramo faltante; ambos ordenados y sin solaparse)
+    needed_from = last_arch_date + timedelta(days=1)
+    df_merge = pd.concat([df_arch_rng, slice_sorted(df_fc, needed_from, end_eff)], ignore_index=True)
+    return (df_merge, None,
+            {"source": f"archive+forecast(past_days={past_days})", "archive_until": last_arch_date})
+
+def _fetch_uv_daily_locations(coords: tuple[tuple[float, float], ...], start: date, end: date) -> list[tuple]:
+    """
+    Núcleo de fetch_uv_daily_smart para N ubicaciones: 'archive' (1 request, o tramos
+    concurrentes si el rango es largo) y, si alguna ubicación queda incompleta,
+    1 request a 'forecast?past_days' para todas.
+    Devuelve una tupla (df, error, meta) por ubicación, en el mismo orden de 'coords'.
+    """
+    # Sanitizar fechas (y evitar pedir hoy en archive)
+    if start > end:
+        start, end = end, start
+    end_eff = min(end, today() - timedelta(days=1))
+
+    # --- 1) ARCHIVE (por tramos si el rango es largo) ---
+    # Si 'end' cae dentro del rezago conocido de archive, el forecast será necesario casi
+    # seguro: se lanza en paralelo (especulativo) en vez de esperar la respuesta de archive.
+    prefetched = None
+    if SPECULATIVE_FORECAST and end_eff > today() - timedelta(days=ARCHIVE_LAG_DAYS):
+        guess_from = max(start, today() - timedelta(days=ARCHIVE_LAG_DAYS + SPECULATIVE_MARGIN_DAYS))
+        past_days = _past_days_from(guess_from)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            fut_fc = submit_in_context(pool, _fetch_forecast_past_days, coords, past_days)
+            dfs_arch, err_arch = _fetch_archive_chunked(coords, start, end_eff)
+            prefetched = (*fut_fc.result(), past_days)
+    else:
+        dfs_arch, err_arch = _fetch_archive_chunked(coords, start, end_eff)
+    results = _fill_from_forecast(coords, dfs_arch, start, end_eff, prefetched)
+    if err_arch:
+        # Tramos del archive fallidos: el resultado puede tener huecos intermedios
+        for _, _, meta in results:
+            meta["archive_error"] = err_arch
+    return results
+
+@timed("fetch.forecast_past_days")
+def _fetch_forecast_past_days(coords: tuple[tuple[float, float], ...], past_days: int):
+    """Forecast diario con 'past_days' hacia atrás para todas las ubicaciones -> (dfs, error)."""
+    p_fc = {
+        **_coords_params(coords),
+        "daily": "uv_index_max",
+        "timezone": "auto",
+        "timeformat": OPEN_METEO_TIMEFORMAT,
+        "past_days": past_days,
+        "forecast_days": 1,
+    }
+    data_fc, err_fc = _safe_json_get(OPEN_METEO_FORECAST, p_fc)
+    return [_uv_json_to_df(d) for d in _split_locations(data_fc, len(coords))], err_fc
+
+def _fill_from_forecast(coords: tuple[tuple[float, float], ...], dfs_arch: list[pd.DataFrame],
+                        start: date, end_eff: date, prefetched: tuple | None = None) -> list[tuple]:
+    """
+    Completa con forecast(past_days) lo que archive no cubrió, para todas las ubicaciones.
+    'prefetched' = (dfs, error, past_days) de una request especulativa; se reutiliza si
+    alcanza hacia atrás lo suficiente, si no se pide de nuevo con más past_days.
+    """
+    # ¿Desde qué día falta cada ubicación? (None = archive ya cubre el rango)
+    needed = []
+    for df_arch in dfs_arch:
+        if df_arch.empty:
+            needed.append(start)
+        else:
+            last_arch_date = last_date(df_arch)
+            needed.append(None if last_arch_date >= end_eff else last_arch_date + timedelta(days=1))
+    if all(n is None for n in needed):
+        return [_merge_archive_forecast(df, pd.DataFrame(), None, start, end_eff, 0) for df in dfs_arch]
+
+    # --- 2) FORECAST past_days (cap 92) suficiente para la ubicación más atrasada ---
+    past_days = _past_days_from(min(n for n in needed if n is not None))
+    if prefetched is not None and prefetched[2] >= past_days and not prefetched[1]:
+        dfs_fc, err_fc, past_days = prefetched
+    else:
+        dfs_fc, err_fc = _fetch_forecast_past_days(coords, past_days)
+    return [
+        _merge_archive_forecast(df_arch, df_fc, err_fc, start, end_eff, past_days)
+        for df_arch, df_fc in zip(dfs_arch, dfs_fc)
+    ]
+
+def _fetch_uv_daily_stored(coords: tuple[tuple[float, float], ...], start: date, end: date) -> list[tuple]:
+    """
+    Como _fetch_uv_daily_locations, pero sirviendo desde el almacén local y descargando
+    sólo los tramos faltantes (agrupando en una request las ubicaciones con el mismo hueco).
+    """
+    if not UV_STORE_ENABLED:
+        return _fetch_uv_daily_locations(coords, start, end)
+    if start > end:
+        start, end = end, start
+    end_eff = min(end, today() - timedelta(days=1))
+
+    store = uv_store()
+    locs = [UVHistoryStore.loc_key(lat, lon) for lat, lon in coords]
+    pending: dict[tuple[date, date], list[int]] = {}
+    for i, loc in enumerate(locs):
+        for rng in store.missing_ranges(loc, start, end_eff):
+            pending.setdefault(rng, []).append(i)
+
+    sources = [[] for _ in coords]
+    errors: list[str | None] = [None] * len(coords)
+    for (a, b), idxs in pending.items():
+        fetched = _fetch_uv_daily_locations(tuple(coords[i] for i in idxs), a, b)
+        for i, (df, err, meta) in zip(idxs, fetched):
+            complete = err is None and "archive_error" not in meta
+            store.save(locs[i], df, a, b, meta.get("archive_until"), complete=complete)
+            sources[i].append(meta["source"])
+            errors[i] = errors[i] or err
+
+    results = []
+    for i, loc in enumerate(locs):
+        df = store.load(loc, start, end_eff).dropna(subset=["uv_index_max"])
+        df = df[["date", "uv_index_max"]].reset_index(drop=True)
+        source = "+".join(["local"] + list(dict.fromkeys(sources[i])))
+        if df.empty:
+            results.append((df, errors[i] or "Sin datos de UVI para el rango/ubicación.", {"source": "empty"}))
+        else:
+            results.append((df, errors[i], {"source": source}))
+    return results
+
+# -----------------------------
+# HISTÓRICO DIARIO UVI (archive -> merge con forecast past_days<=92 si falta)
+# -----------------------------
+@timed("fetch.uv_daily")
+def fetch_uv_daily_smart(lat: float, lon: float, start: date, end: date):
+    """
+    1) Sirve desde el almacén local lo ya descargado y pide sólo los tramos faltantes.
+    2) Cada tramo intenta 'archive'; si viene vacío o incompleto, usa 'forecast?past_days<=92'
+       para completar SOLO los días faltantes hasta 'end' y fusiona sin duplicados.
+    Devuelve: (df, error, meta_dict)
+    meta_dict['source']: 'local' más lo descargado en esta llamada, p. ej. 'local',
+      'local+archive', 'local+archive+forecast(past_days=N)'; 'empty' si no hay datos.
+      Con UV_STORE=0: 'archive', 'forecast(past_days=N)', 'archive+forecast(past_days=N)',
+      'empty' o 'none' (más 'archive_until' / 'archive_error' cuando corresponde).
+    meta_dict['stale'] = True si es el valor anterior mientras se recalcula en segundo plano.
+    """
+    (df, err, meta), stale = _fetch_uv_daily_smart_cached.lookup(lat, lon, start, end, cache_run_key(end))
+    return df, err, ({**meta, "stale": True} if stale else meta)
+
+@cached(max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: r[1] is not None)
+def _fetch_uv_daily_smart_cached(lat: float, lon: float, start: date, end: date, run_key: str):
+    return _fetch_uv_daily_stored(((lat, lon),), start, end)[0]
+
+@timed("fetch.uv_daily")
+def fetch_uv_daily_multi(cities: tuple[str, ...], start: date, end: date):
+    """
+    Igual que fetch_uv_daily_smart pero para varias ciudades de NORTE_GRANDE_CITIES
+    en una sola request por endpoint.
+    Devuelve: (df largo [city, date, uv_index_max], {ciudad: error}, {ciudad: meta_dict})
+    """
+    key = (tuple(cities), start, end, cache_run_key(end))
+    (df_all, errors, metas), stale = _fetch_uv_daily_multi_cached.lookup(*key)
+    if stale:
+        # Valor de la corrida anterior mientras se recalcula en segundo plano
+        metas = {city: {**meta, "stale": True} for city, meta in metas.items()}
+    return df_all, errors, metas
+
+def refresh_uv_daily_multi(cities: tuple[str, ...], start: date, end: date):
+    """Precarga: recalcula la entrada que lee fetch_uv_daily_multi aunque siga vigente."""
+    return _fetch_uv_daily_multi_cached.refresh(tuple(cities), start, end, cache_run_key(end))
+
+@cached(max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: any(r[1].values()))
+def _fetch_uv_daily_multi_cached(cities: tuple[str, ...], start: date, end: date, run_key: str):
+    coords = tuple(NORTE_GRANDE_CITIES[c] for c in cities)
+    results = _fetch_uv_daily_stored(coords, start, end)
+    frames, errors, metas = [], {}, {}
+    for city, (df, err, meta) in zip(cities, results):
+        errors[city], metas[city] = err, meta
+        if not df.empty:
+            frames.append(df.assign(city=city)[["city", "date", "uv_index_max"]])
+    df_all = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["city", "date", "uv_index_max"])
+    df_all["city"] = pd.Categorical(df_all["city"], categories=cities)
+    return df_all, errors, metas
+
+# -----------------------------
+# PRONÓSTICO HORARIO UVI
+# -----------------------------
+# Se descarga siempre el horizonte máximo (una vez por ciudad) y cada valor del slider
+# "Pronóstico (días)" es un recorte local del mismo DataFrame.
+FORECAST_MAX_DAYS = 7
+
+def _slice_forecast_days(df: pd.DataFrame, days: int) -> pd.DataFrame:
+    """Primeros 'days' días (locales) de un pronóstico horario ordenado por 'time'."""
+    if df.empty:
+        return df
+    limit = df["time"].iloc[0].normalize() + pd.Timedelta(days=int(days))
+    return df.iloc[:df["time"].searchsorted(limit, side="left")]
+
+@cached(ttl=FORECAST_TTL, max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: r[1] is not None)
+def _fetch_uv_forecast_hourly_max(lat: float, lon: float, run_key: str):
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": "uv_index",
+        "timezone": "auto",
+        "forecast_days": FORECAST_MAX_DAYS,
+    }
+    data, err = _safe_json_get(OPEN_METEO_FORECAST, params)
+    if err:
+        return pd.DataFrame(), f"Error pronóstico: {err}"
+
+    if "hourly" not in data or "time" not in data["hourly"]:
+        return pd.DataFrame(), "Sin datos horarios en la respuesta."
+
+    return _hourly_json_to_df(data), None
+
+@timed("fetch.uv_forecast")
+def fetch_uv_forecast_hourly(lat: float, lon: float, days: int = 5):
+    df, err = _fetch_uv_forecast_hourly_max(lat, lon, forecast_run_key())
+    return _slice_forecast_days(df, days), err
+
+@cached(ttl=FORECAST_TTL, max_entries=CACHE_MAX_ENTRIES, swr=True, is_error=lambda r: r[1] is not None)
+def _fetch_uv_forecast_hourly_multi_max(cities: tuple[str, ...], run_key: str):
+    coords = tuple(NORTE_GRANDE_CITIES[c] for c in cities)
+    params = {
+        **_coords_params(coords),
+        "hourly": "uv_index",
+        "timezone": "auto",
+        "forecast_days": FORECAST_MAX_DAYS,
+    }
+    data, err = _safe_json_get(OPEN_METEO_FORECAST, params)
+    if err:
+        return pd.DataFrame(), f"Error pronóstico: {err}"
+
+    frames = []
+    for city, d in zip(cities, _split_locations(data, len(coords))):
+        if "hourly" in d and "time" in d["hourly"]:
+            frames.append(_hourly_json_to_df(d).assign(city=city)[["city", "time", "uv_index"]])
+    if not frames:
+        return pd.DataFrame(), "Sin datos horarios en la respuesta."
+    # Orden global por hora: permite recortar por días con búsqueda binaria
+    df = pd.concat(frames, ignore_index=True)
+    df["city"] = pd.Categorical(df["city"], categories=cities)
+    return df.sort_values("time", kind="stable").reset_index(drop=True), None
+
+@timed("fetch.uv_forecast")
+def fetch_uv_forecast_hourly_multi(cities: tuple[str, ...], days: int = 5):
+    """Pronóstico horario de varias ciudades en una request. Devuelve (df largo [city, time, uv_index], error)."""
+    df, err = _fetch_uv_forecast_hourly_multi_max(tuple(cities), forecast_run_key())
+    return _slice_forecast_days(df, days), err
+
+def refresh_uv_forecast_hourly_multi(cities: tuple[str, ...]):
+    """Precarga: recalcula el pronóstico de la corrida vigente que lee fetch_uv_forecast_hourly_multi."""
+    return _fetch_uv_forecast_hourly_multi_max.refresh(tuple(cities), forecast_run_key())